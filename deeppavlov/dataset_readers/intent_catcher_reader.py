@@ -9,11 +9,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from json import load
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
 from logging import getLogger
 from pathlib import Path
 from typing import Dict, List, Tuple
 
+import orjson
+
 from deeppavlov.core.common.registry import register
 from deeppavlov.core.data.dataset_reader import DatasetReader
 
@@ -34,10 +37,7 @@ class IntentCatcherReader(DatasetReader):
                 "data path {} does not exist or is empty!".format(
                     data_path))
 
-        data = {"train": [],
-                "valid": [],
-                "test": []}
-
+        files = {}
         for data_type in data_types:
             file_name = kwargs.get(data_type, '{}.{}'.format(data_type, "json"))
             if file_name is None:
@@ -45,11 +45,23 @@ class IntentCatcherReader(DatasetReader):
 
             file = Path(data_path).joinpath(file_name)
             if file.exists():
-                with open(file) as fp:
-                    file = load(fp)
-                for label in file:
-                    data[data_type].extend([(phrase, label) for phrase in file[label]])
+                files[data_type] = file
             else:
                 log.warning("Cannot find {} file".format(file))
 
+        # splits are independent, so they are read and parsed concurrently
+        with ThreadPoolExecutor(max_workers=len(data_types)) as executor:
+            futures = {data_type: executor.submit(self._read_file, file) for data_type, file in files.items()}
+            data = {data_type: futures[data_type].result() if data_type in futures else []
+                    for data_type in data_types}
+
         return data
+
+    @staticmethod
+    def _read_file(file: Path) -> List[Tuple[str, str]]:
+        with open(file, 'rb') as fp:
+            intents = orjson.loads(fp.read())
+        samples = []
+        for label, phrases in intents.items():
+            samples += zip(phrases, repeat(label))
+        return samples
@@ -14,7 +14,7 @@
 
 import logging
 from overrides import overrides
-from typing import List, Union, Optional
+from typing import Callable, List, Union, Optional
 
 import numpy as np
 import torch
@@ -53,6 +53,9 @@ class TorchTextClassificationModel(TorchModel):
         learning_rate_drop_div: the divider of the learning rate after `learning_rate_drop_patience` unsuccessful
             validations
         return_probas: whether to return probabilities or index of classes (only for `multilabel=False`)
+        compile_inference: whether to compile the model for inference. The model is compiled with `torch.compile`
+            on torch>=2.0 and traced with `torch.jit.trace` on the first inference batch on older versions,
+            so the network must not have control flow depending on shapes of inputs (true for `ShallowAndWideCnn`)
 
     Attributes:
         opt: dictionary with all model parameters
@@ -78,6 +81,7 @@ class TorchTextClassificationModel(TorchModel):
                  learning_rate_drop_patience: Optional[int] = None,
                  learning_rate_drop_div: Optional[float] = None,
                  return_probas: bool = True,
+                 compile_inference: bool = False,
                  **kwargs):
 
         if n_classes == 0:
@@ -102,6 +106,7 @@ class TorchTextClassificationModel(TorchModel):
             lr_scheduler=lr_scheduler,
             lr_scheduler_parameters=lr_scheduler_parameters,
             return_probas=return_probas,
+            compile_inference=compile_inference,
             **kwargs)
 
     def __call__(self, texts: List[np.ndarray], *args) -> Union[List[List[float]], List[int]]:
@@ -118,20 +123,37 @@ class TorchTextClassificationModel(TorchModel):
                 or list of labels sentence belongs with
         """
         with torch.no_grad():
-            features = np.array(texts)
-            inputs = torch.from_numpy(features)
-            inputs = inputs.to(self.device)
-            outputs = self.model(inputs)
+            inputs = self._to_device(self._features_to_array(texts))
+            outputs = self._get_inference_model(inputs)(inputs)
+            if not self.opt["return_probas"]:
+                # softmax keeps the order of logits, so only indices of classes are computed and copied from device
+                return outputs.argmax(dim=-1).cpu().tolist()
             if self.opt["multilabel"]:
                 outputs = torch.nn.functional.sigmoid(outputs)
             else:
                 outputs = torch.nn.functional.softmax(outputs, dim=-1)
 
-        outputs = outputs.cpu().detach().numpy()
-        if self.opt["return_probas"]:
-            return outputs.tolist()
-        else:
-            return np.argmax(outputs, axis=-1).tolist()
+        return outputs.cpu().tolist()
+
+    @overrides
+    def load(self, fname: Optional[str] = None, *args, **kwargs) -> None:
+        super().load(fname, *args, **kwargs)
+        self._compiled_model = None
+
+    def _get_inference_model(self, inputs: torch.Tensor) -> Callable[[torch.Tensor], torch.Tensor]:
+        """Returns the compiled model if `compile_inference` is set and the model is in eval mode,
+        the model itself otherwise"""
+        if not self.opt.get("compile_inference", False) or self.model.training:
+            return self.model
+        if self._compiled_model is None:
+            if hasattr(torch, "compile"):
+                # number of tokens is not fixed, so compile for dynamic shapes to avoid recompilation on every length
+                self._compiled_model = torch.compile(self.model, dynamic=True)
+            else:
+                # without branches depending on shapes of inputs the trace fits any batch size and number of tokens,
+                # dropout and batch normalization are traced in eval mode
+                self._compiled_model = torch.jit.trace(self.model, inputs, check_trace=False)
+        return self._compiled_model
 
     @overrides
     def process_event(self, event_name: str, data: dict):
@@ -162,10 +184,8 @@ class TorchTextClassificationModel(TorchModel):
         Returns:
             metrics values on the given batch
         """
-        features, labels = np.array(texts), np.array(labels)
-
-        inputs, labels = torch.from_numpy(features), torch.from_numpy(labels)
-        inputs, labels = inputs.to(self.device), labels.to(self.device)
+        inputs = self._to_device(self._features_to_array(texts))
+        labels = self._to_device(np.asarray(labels))
         # zero the parameter gradients
         self.optimizer.zero_grad()
 
@@ -179,6 +199,19 @@ class TorchTextClassificationModel(TorchModel):
             self.lr_scheduler.step()
         return loss.item()
 
+    def _features_to_array(self, texts: List[np.ndarray]) -> np.ndarray:
+        """Convert batch of texts to an array of dtype expected by the network in a single copy."""
+        return np.asarray(texts, dtype=np.float32 if self.opt["embedded_tokens"] else np.int64)
+
+    def _to_device(self, array: np.ndarray) -> torch.Tensor:
+        """Move array to `self.device`. For `cuda` the host tensor is pinned, so the copy can be done asynchronously
+        and overlap with computations of the previous batch.
+        """
+        tensor = torch.as_tensor(array)
+        if self.device.type == "cuda":
+            tensor = tensor.pin_memory()
+        return tensor.to(self.device, non_blocking=True)
+
     def cnn_model(self, kernel_sizes_cnn: List[int], filters_cnn: int, dense_size: int, dropout_rate: float = 0.0,
                   **kwargs) -> nn.Module:
         """Build un-compiled model of shallow-and-wide CNN.
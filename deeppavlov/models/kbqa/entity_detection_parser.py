@@ -59,7 +59,7 @@ class EntityDetectionParser(Component):
                 or simply a list of entity substrings
             thres_proba: if the probability of the tag is less than thres_proba, we assign the tag as 'O'
         """
-        self.entity_tags = entity_tags
+        self.entity_tags = frozenset(entity_tags)
         self.type_tag = type_tag
         self.o_tag = o_tag
         self.ignore_points = ignore_points
@@ -69,9 +69,10 @@ class EntityDetectionParser(Component):
         with open(str(expand_path(tags_file))) as fl:
             tags = [line.split('\t')[0] for line in fl.readlines()]
             self.entity_prob_ind = {entity_tag: [i for i, tag in enumerate(tags) if entity_tag in tag]
-                                    for entity_tag in self.entity_tags}
+                                    for entity_tag in entity_tags}
             self.type_prob_ind = [i for i, tag in enumerate(tags) if self.type_tag in tag]
-            self.et_prob_ind = [i for tag, ind in self.entity_prob_ind.items() for i in ind] + self.type_prob_ind
+            self.et_prob_ind = frozenset([i for tag, ind in self.entity_prob_ind.items() for i in ind]
+                                         + self.type_prob_ind)
             for entity_tag, tag_ind in self.entity_prob_ind.items():
                 for ind in tag_ind:
                     self.tag_ind_dict[ind] = entity_tag
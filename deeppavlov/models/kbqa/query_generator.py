@@ -14,6 +14,8 @@
 
 import itertools
 import re
+from functools import lru_cache
+import logging
 from logging import getLogger
 from typing import Tuple, List, Optional, Union, Dict, Any
 from collections import namedtuple, defaultdict
@@ -26,11 +28,24 @@ from deeppavlov.models.kbqa.wiki_parser import WikiParser
 from deeppavlov.models.kbqa.rel_ranking_infer import RelRankerInfer
 from deeppavlov.models.kbqa.rel_ranking_bert_infer import RelRankerBertInfer
 from deeppavlov.models.kbqa.utils import \
-    extract_year, extract_number, order_of_answers_sorting, make_combs, fill_query
+    extract_year, extract_number, order_of_answers_sorting, make_combs, make_query_filler
 from deeppavlov.models.kbqa.query_generator_base import QueryGeneratorBase
 
 log = getLogger(__name__)
 
+_BRACES_RE = re.compile(r"{[ ]?(.*?)[ ]?}")
+_SELECT_RE = re.compile(r"select [\(]?([\S]+) ")
+_ORDER_RE = re.compile(r"order by (asc|desc)\((.*)\)")
+_CONTAINS_RE = re.compile(r"contains\((\?\w), (.+?)\)")
+
+OrderInfo = namedtuple("OrderInfo", ["variable", "sorting_order"])
+
+
+@lru_cache(maxsize=1024)
+def _word_tokenize(question: str) -> Tuple[str, ...]:
+    """Cached nltk tokenization, the same question is parsed with several templates"""
+    return tuple(nltk.word_tokenize(question))
+
 
 @register('query_generator')
 class QueryGenerator(QueryGeneratorBase):
@@ -70,6 +85,37 @@ class QueryGenerator(QueryGeneratorBase):
                          entities_to_leave=self.entities_to_leave, rels_to_leave=self.rels_to_leave,
                          return_answers=self.return_answers, *args, **kwargs)
 
+    def load(self) -> None:
+        super().load()
+        for template in self.template_queries.values():
+            template["_parsed"] = self.parse_template(template)
+
+    def parse_template(self, query_info: Dict[str, Any]) -> Dict[str, Any]:
+        """Extracts from the query template everything which does not depend on the question"""
+        query = query_info["query_template"].lower()
+        for old_tok, new_tok in self.replace_tokens:
+            query = query.replace(old_tok, new_tok)
+        rels_for_search = query_info["rank_rels"]
+        rel_types = query_info["rel_types"]
+        query_seq_num = query_info["query_sequence"]
+        query_triplets = _BRACES_RE.findall(query)[0].split(' . ')
+        query_triplets = [triplet.split(' ')[:3] for triplet in query_triplets]
+        query_sequence_dict = {num: triplet for num, triplet in zip(query_seq_num, query_triplets)}
+        query_sequence = []
+        for i in range(1, max(query_seq_num) + 1):
+            query_sequence.append(query_sequence_dict[i])
+        triplet_info_list = [("forw" if triplet[2].startswith('?') else "backw", search_source, rel_type)
+                             for search_source, triplet, rel_type in zip(rels_for_search, query_triplets, rel_types) if
+                             search_source != "do_not_rank"]
+        return {"query": query,
+                "query_sequence": query_sequence,
+                "query_fillers": [make_query_filler(query_hdt_elem) for query_hdt_elem in query_sequence],
+                "triplet_info_list": triplet_info_list,
+                "rels_from_query": [triplet[1] for triplet in query_triplets if triplet[1].startswith('?')],
+                "answer_ent": _SELECT_RE.findall(query),
+                "order_variable": _ORDER_RE.findall(query),
+                "filter_from_query": _CONTAINS_RE.findall(query)}
+
     def __call__(self, question_batch: List[str],
                  question_san_batch: List[str],
                  template_type_batch: Union[List[List[str]], List[str]],
@@ -89,12 +135,13 @@ class QueryGenerator(QueryGeneratorBase):
         if self.return_answers:
             answers = self.rel_ranker(question_batch, candidate_outputs_batch, entities_from_ner_batch,
                                       template_answers_batch)
-            log.debug(f"(__call__)answers: {answers}")
+            log.debug("(__call__)answers: %s", answers)
             if not answers:
                 answers = ["Not Found"]
             return answers
         else:
-            log.debug(f"(__call__)candidate_outputs_batch: {[output[:5] for output in candidate_outputs_batch]}")
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("(__call__)candidate_outputs_batch: %s", [output[:5] for output in candidate_outputs_batch])
             return candidate_outputs_batch
 
     def query_parser(self, question: str, query_info: Dict[str, str],
@@ -102,55 +149,39 @@ class QueryGenerator(QueryGeneratorBase):
                      entity_ids: List[List[str]],
                      type_ids: List[List[str]],
                      rels_from_template: Optional[List[Tuple[str]]] = None) -> List[List[Union[Tuple[Any, ...], Any]]]:
-        question_tokens = nltk.word_tokenize(question)
-        query = query_info["query_template"].lower()
-        for old_tok, new_tok in self.replace_tokens:
-            query = query.replace(old_tok, new_tok)
-        log.debug(f"\n_______________________________\nquery: {query}\n_______________________________\n")
-        rels_for_search = query_info["rank_rels"]
-        rel_types = query_info["rel_types"]
-        query_seq_num = query_info["query_sequence"]
+        question_tokens = _word_tokenize(question)
+        parsed_template = query_info["_parsed"]
+        query = parsed_template["query"]
+        log.debug("\n_______________________________\nquery: %s\n_______________________________\n", query)
         return_if_found = query_info["return_if_found"]
         define_sorting_order = query_info["define_sorting_order"]
         property_types = query_info["property_types"]
-        log.debug(f"(query_parser)query: {query}, {rels_for_search}, {query_seq_num}, {return_if_found}")
-        query_triplets = re.findall("{[ ]?(.*?)[ ]?}", query)[0].split(' . ')
-        log.debug(f"(query_parser)query_triplets: {query_triplets}")
-        query_triplets = [triplet.split(' ')[:3] for triplet in query_triplets]
-        query_sequence_dict = {num: triplet for num, triplet in zip(query_seq_num, query_triplets)}
-        query_sequence = []
-        for i in range(1, max(query_seq_num) + 1):
-            query_sequence.append(query_sequence_dict[i])
-        triplet_info_list = [("forw" if triplet[2].startswith('?') else "backw", search_source, rel_type)
-                             for search_source, triplet, rel_type in zip(rels_for_search, query_triplets, rel_types) if
-                             search_source != "do_not_rank"]
-        log.debug(f"(query_parser)rel_directions: {triplet_info_list}")
-        entity_ids = [entity[:self.entities_to_leave] for entity in entity_ids]
+        query_fillers = parsed_template["query_fillers"]
+        triplet_info_list = parsed_template["triplet_info_list"]
+        log.debug("(query_parser)rel_directions: %s", triplet_info_list)
         if rels_from_template is not None:
             rels = [[(rel, 1.0) for rel in rel_list] for rel_list in rels_from_template]
         else:
-            rels = [self.find_top_rels(question, entity_ids, triplet_info)
-                    for triplet_info in triplet_info_list]
-        log.debug(f"(query_parser)rels: {rels}")
-        rels_from_query = [triplet[1] for triplet in query_triplets if triplet[1].startswith('?')]
-        answer_ent = re.findall("select [\(]?([\S]+) ", query)
-        order_info_nt = namedtuple("order_info", ["variable", "sorting_order"])
-        order_variable = re.findall("order by (asc|desc)\((.*)\)", query)
+            rels = self.find_top_rels_batch(question, entity_ids, triplet_info_list)
+        log.debug("(query_parser)rels: %s", rels)
+        rels_from_query = parsed_template["rels_from_query"]
+        answer_ent = parsed_template["answer_ent"]
+        order_variable = parsed_template["order_variable"]
         if order_variable:
             if define_sorting_order:
                 answers_sorting_order = order_of_answers_sorting(question)
             else:
                 answers_sorting_order = order_variable[0][0]
-            order_info = order_info_nt(order_variable[0][1], answers_sorting_order)
+            order_info = OrderInfo(order_variable[0][1], answers_sorting_order)
         else:
-            order_info = order_info_nt(None, None)
-        log.debug(f"question, order_info: {question}, {order_info}")
-        filter_from_query = re.findall("contains\((\?\w), (.+?)\)", query)
-        log.debug(f"(query_parser)filter_from_query: {filter_from_query}")
+            order_info = OrderInfo(None, None)
+        log.debug("question, order_info: %s, %s", question, order_info)
+        filter_from_query = parsed_template["filter_from_query"]
+        log.debug("(query_parser)filter_from_query: %s", filter_from_query)
 
         year = extract_year(question_tokens, question)
         number = extract_number(question_tokens, question)
-        log.debug(f"year {year}, number {number}")
+        log.debug("year %s, number %s", year, number)
         if year:
             filter_info = [(elem[0], elem[1].replace("n", year)) for elem in filter_from_query]
         elif number:
@@ -159,22 +190,23 @@ class QueryGenerator(QueryGeneratorBase):
             filter_info = [elem for elem in filter_from_query if elem[1] != "n"]
         for unk_prop, prop_type in property_types.items():
             filter_info.append((unk_prop, prop_type))
-        log.debug(f"(query_parser)filter_from_query: {filter_from_query}")
+        log.debug("(query_parser)filter_from_query: %s", filter_from_query)
         rel_combs = make_combs(rels, permut=False)
-        import datetime
-        start_time = datetime.datetime.now()
         entity_positions, type_positions = [elem.split('_') for elem in entities_and_types_select.split(' ')]
-        log.debug(f"entity_positions {entity_positions}, type_positions {type_positions}")
+        log.debug("entity_positions %s, type_positions %s", entity_positions, type_positions)
         selected_entity_ids = [entity_ids[int(pos) - 1] for pos in entity_positions if int(pos) > 0]
         selected_type_ids = [type_ids[int(pos) - 1] for pos in type_positions if int(pos) > 0]
         entity_combs = make_combs(selected_entity_ids, permut=True)
         type_combs = make_combs(selected_type_ids, permut=False)
-        log.debug(f"(query_parser)entity_combs: {entity_combs[:3]}, type_combs: {type_combs[:3]},"
-                  f" rel_combs: {rel_combs[:3]}")
+        log.debug("(query_parser)entity_combs: %s, type_combs: %s, rel_combs: %s",
+                  entity_combs[:3], type_combs[:3], rel_combs[:3])
         queries_list = []
         parser_info_list = []
         confidences_list = []
-        all_combs_list = list(itertools.product(entity_combs, type_combs, rel_combs))
+        # combinations are consumed lazily, only first max_comb_num + 1 of them are used
+        all_combs_list = list(itertools.islice(itertools.product(entity_combs, type_combs, rel_combs),
+                                               self.max_comb_num + 1))
+        what_return = rels_from_query + answer_ent
         if self.wiki_file_format == "pickle":
             total_entities_list = list(itertools.chain.from_iterable(selected_entity_ids)) + \
                                   list(itertools.chain.from_iterable(selected_type_ids))
@@ -182,14 +214,12 @@ class QueryGenerator(QueryGeneratorBase):
         for comb_num, combs in enumerate(all_combs_list):
             confidence = np.prod([score for rel, score in combs[2][:-1]])
             confidences_list.append(confidence)
-            query_hdt_seq = [
-                fill_query(query_hdt_elem, combs[0], combs[1], combs[2]) for query_hdt_elem in query_sequence]
+            query_hdt_seq = [filler(combs[0], combs[1], combs[2]) for filler in query_fillers]
             if comb_num == 0:
-                log.debug(f"\n__________________________\nfilled query: {query_hdt_seq}\n__________________________\n")
-            queries_list.append((rels_from_query + answer_ent, query_hdt_seq, filter_info, order_info, return_if_found))
+                log.debug("\n__________________________\nfilled query: %s\n__________________________\n",
+                          query_hdt_seq)
+            queries_list.append((what_return, query_hdt_seq, filter_info, order_info, return_if_found))
             parser_info_list.append("query_execute")
-            if comb_num == self.max_comb_num:
-                break
 
         candidate_outputs = []
         candidate_outputs_list = self.wiki_parser(parser_info_list, queries_list)
@@ -201,8 +231,9 @@ class QueryGenerator(QueryGeneratorBase):
             all_combs_list = all_combs_list[:outputs_len]
             confidences_list = confidences_list[:outputs_len]
             for combs, confidence, candidate_output in zip(all_combs_list, confidences_list, candidate_outputs_list):
-                candidate_outputs += [[combs[0]] + [rel for rel, score in combs[2][:-1]] + output + [confidence]
-                                      for output in candidate_output]
+                entity_comb = [combs[0]]
+                rel_comb = [rel for rel, score in combs[2][:-1]]
+                candidate_outputs.extend(entity_comb + rel_comb + output + [confidence] for output in candidate_output)
             if self.return_all_possible_answers:
                 candidate_outputs_dict = defaultdict(list)
                 for candidate_output in candidate_outputs:
@@ -214,7 +245,6 @@ class QueryGenerator(QueryGeneratorBase):
                                              [tuple([ans for ans, conf in candidate_output]), candidate_output[0][1]])
             else:
                 candidate_outputs = [output[1:] for output in candidate_outputs]
-        log.debug(f"(query_parser)loop time: {datetime.datetime.now() - start_time}")
-        log.debug(f"(query_parser)final outputs: {candidate_outputs[:3]}")
+        log.debug("(query_parser)final outputs: %s", candidate_outputs[:3])
 
         return candidate_outputs
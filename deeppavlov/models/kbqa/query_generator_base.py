@@ -12,8 +12,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import logging
+from collections import defaultdict
+from functools import lru_cache
 from logging import getLogger
-from typing import Tuple, List, Optional, Union, Any
+from typing import Tuple, List, Optional, Union, Any, Sequence
 
 from whapi import search, get_html
 from bs4 import BeautifulSoup
@@ -26,6 +29,7 @@ from deeppavlov.models.kbqa.template_matcher import TemplateMatcher
 from deeppavlov.models.kbqa.entity_linking import EntityLinker
 from deeppavlov.models.kbqa.rel_ranking_infer import RelRankerInfer
 from deeppavlov.models.kbqa.rel_ranking_bert_infer import RelRankerBertInfer
+from deeppavlov.models.kbqa.utils import clean_question
 
 log = getLogger(__name__)
 
@@ -80,27 +84,31 @@ class QueryGeneratorBase(Component, Serializable):
         self.rel_ranker = rel_ranker
         self.rank_rels_filename_1 = rank_rels_filename_1
         self.rank_rels_filename_2 = rank_rels_filename_2
-        self.rank_list_0 = []
-        self.rank_list_1 = []
+        self.rank_list_0 = ()
+        self.rank_list_1 = ()
         self.entities_to_leave = entities_to_leave
         self.rels_to_leave = rels_to_leave
         self.syntax_structure_known = syntax_structure_known
         self.use_api_requester = use_api_requester
         self.sparql_queries_filename = sparql_queries_filename
         self.return_answers = return_answers
+        self.link_entities = lru_cache(maxsize=1024)(self._link_entities)
+        self.link_types = lru_cache(maxsize=4096)(self._link_types)
 
         self.load()
 
     def load(self) -> None:
-        with open(self.load_path / self.rank_rels_filename_1, 'r') as fl1:
-            lines = fl1.readlines()
-            self.rank_list_0 = [line.split('\t')[0] for line in lines]
-
-        with open(self.load_path / self.rank_rels_filename_2, 'r') as fl2:
-            lines = fl2.readlines()
-            self.rank_list_1 = [line.split('\t')[0] for line in lines]
+        self.rank_list_0 = tuple(line.partition('\t')[0] for line in
+                                 (self.load_path / self.rank_rels_filename_1).read_text().splitlines())
+        self.rank_list_1 = tuple(line.partition('\t')[0] for line in
+                                 (self.load_path / self.rank_rels_filename_2).read_text().splitlines())
 
         self.template_queries = read_json(str(expand_path(self.sparql_queries_filename)))
+        self.templates_index = defaultdict(list)
+        if not self.syntax_structure_known:
+            for template in self.template_queries.values():
+                entities_and_types_num = tuple(template["entities_and_types_num"])
+                self.templates_index[(template["template_num"], entities_and_types_num)].append(template)
 
     def save(self) -> None:
         pass
@@ -114,17 +122,14 @@ class QueryGeneratorBase(Component, Serializable):
         candidate_outputs = []
         self.template_nums = template_types
 
-        replace_tokens = [(' - ', '-'), (' .', ''), ('{', ''), ('}', ''), ('  ', ' '), ('"', "'"), ('(', ''),
-                          (')', ''), ('–', '-')]
-        for old, new in replace_tokens:
-            question = question.replace(old, new)
+        question = clean_question(question)
 
         entities_from_template, types_from_template, rels_from_template, rel_dirs_from_template, query_type_template, \
         entity_types, template_answer, template_found = self.template_matcher(question_sanitized, entities_from_ner)
         self.template_nums = [query_type_template]
 
-        log.debug(f"question: {question}\n")
-        log.debug(f"template_type {self.template_nums}")
+        log.debug("question: %s\n", question)
+        log.debug("template_type %s", self.template_nums)
 
         if entities_from_template or types_from_template:
             if rels_from_template[0][0] == "PHOW":
@@ -134,26 +139,26 @@ class QueryGeneratorBase(Component, Serializable):
                 entity_ids = self.get_entity_ids(entities_from_template, "entities", template_found, question,
                                                  entity_types)
                 type_ids = self.get_entity_ids(types_from_template, "types")
-                log.debug(f"entities_from_template {entities_from_template}")
-                log.debug(f"entity_types {entity_types}")
-                log.debug(f"types_from_template {types_from_template}")
-                log.debug(f"rels_from_template {rels_from_template}")
-                log.debug(f"entity_ids {entity_ids}")
-                log.debug(f"type_ids {type_ids}")
+                log.debug("entities_from_template %s", entities_from_template)
+                log.debug("entity_types %s", entity_types)
+                log.debug("types_from_template %s", types_from_template)
+                log.debug("rels_from_template %s", rels_from_template)
+                log.debug("entity_ids %s", entity_ids)
+                log.debug("type_ids %s", type_ids)
 
                 candidate_outputs = self.sparql_template_parser(question_sanitized, entity_ids, type_ids,
                                                                 rels_from_template,
                                                                 rel_dirs_from_template)
 
         if not candidate_outputs and entities_from_ner:
-            log.debug(f"(__call__)entities_from_ner: {entities_from_ner}")
-            log.debug(f"(__call__)types_from_ner: {types_from_ner}")
+            log.debug("(__call__)entities_from_ner: %s", entities_from_ner)
+            log.debug("(__call__)types_from_ner: %s", types_from_ner)
             entity_ids = self.get_entity_ids(entities_from_ner, "entities", question=question)
             type_ids = self.get_entity_ids(types_from_ner, "types")
-            log.debug(f"(__call__)entity_ids: {entity_ids}")
-            log.debug(f"(__call__)type_ids: {type_ids}")
+            log.debug("(__call__)entity_ids: %s", entity_ids)
+            log.debug("(__call__)type_ids: %s", type_ids)
             self.template_nums = template_types
-            log.debug(f"(__call__)self.template_nums: {self.template_nums}")
+            log.debug("(__call__)self.template_nums: %s", self.template_nums)
             if not self.syntax_structure_known:
                 entity_ids = entity_ids[:3]
             candidate_outputs = self.sparql_template_parser(question_sanitized, entity_ids, type_ids)
@@ -164,42 +169,55 @@ class QueryGeneratorBase(Component, Serializable):
                        template_found: str = None,
                        question: str = None,
                        entity_types: List[List[str]] = None) -> List[List[str]]:
+        """Links entities or types, results are cached as the same substrings recur across questions"""
         entity_ids = []
         if what_to_link == "entities":
             if entity_types:
-                el_output = self.linker_entities([entities], [template_found], [question], [entity_types])
-            else:
-                el_output = self.linker_entities([entities], [template_found], [question])
-            if self.use_api_requester:
-                el_output = el_output[0]
-            entity_ids, _ = el_output
-            if not self.use_api_requester and entity_ids:
-                entity_ids = entity_ids[0]
+                entity_types = tuple(tuple(types) for types in entity_types)
+            entity_ids = self.link_entities(tuple(entities), template_found, question, entity_types)
         if what_to_link == "types":
-            entity_ids, _ = self.linker_types([entities])
-            entity_ids = entity_ids[0]
+            entity_ids = self.link_types(tuple(entities))
 
         return entity_ids
 
+    def _link_entities(self, entities: Tuple[str, ...],
+                       template_found: Optional[str],
+                       question: Optional[str],
+                       entity_types: Optional[Tuple[Tuple[str, ...], ...]]) -> List[List[str]]:
+        if entity_types:
+            el_output = self.linker_entities([list(entities)], [template_found], [question],
+                                             [[list(types) for types in entity_types]])
+        else:
+            el_output = self.linker_entities([list(entities)], [template_found], [question])
+        if self.use_api_requester:
+            el_output = el_output[0]
+        entity_ids, _ = el_output
+        if not self.use_api_requester and entity_ids:
+            entity_ids = entity_ids[0]
+        return entity_ids
+
+    def _link_types(self, types: Tuple[str, ...]) -> List[List[str]]:
+        entity_ids, _ = self.linker_types([list(types)])
+        return entity_ids[0]
+
     def sparql_template_parser(self, question: str,
                                entity_ids: List[List[str]],
                                type_ids: List[List[str]],
                                rels_from_template: Optional[List[Tuple[str]]] = None,
                                rel_dirs_from_template: Optional[List[str]] = None) -> List[Tuple[str]]:
         candidate_outputs = []
-        log.debug(f"(find_candidate_answers)self.template_nums: {self.template_nums}")
+        log.debug("(find_candidate_answers)self.template_nums: %s", self.template_nums)
+        # the same entity ids are used by every template, so they are truncated once
+        entity_ids = [tuple(entity[:self.entities_to_leave]) for entity in entity_ids]
         templates = []
         for template_num in self.template_nums:
-            for num, template in self.template_queries.items():
-                if (num == template_num and self.syntax_structure_known) or \
-                        (template["template_num"] == template_num and not self.syntax_structure_known):
-                    templates.append(template)
-        templates = [template for template in templates if
-                     (not self.syntax_structure_known and [len(entity_ids), len(type_ids)] == template[
-                         "entities_and_types_num"])
-                     or self.syntax_structure_known]
-        templates_string = '\n'.join([template["query_template"] for template in templates])
-        log.debug(f"{templates_string}")
+            if self.syntax_structure_known:
+                if template_num in self.template_queries:
+                    templates.append(self.template_queries[template_num])
+            else:
+                templates += self.templates_index.get((template_num, (len(entity_ids), len(type_ids))), [])
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("%s", '\n'.join([template["query_template"] for template in templates]))
         if not templates:
             return candidate_outputs
         if rels_from_template is not None:
@@ -228,11 +246,12 @@ class QueryGeneratorBase(Component, Serializable):
                     if candidate_outputs:
                         return candidate_outputs
 
-        log.debug("candidate_rels_and_answers:\n" + '\n'.join([str(output) for output in candidate_outputs[:5]]))
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("candidate_rels_and_answers:\n%s", '\n'.join([str(output) for output in candidate_outputs[:5]]))
 
         return candidate_outputs
 
-    def find_top_rels(self, question: str, entity_ids: List[List[str]], triplet_info: Tuple) -> List[Tuple[str, Any]]:
+    def find_candidate_rels(self, entity_ids: List[List[str]], triplet_info: Tuple) -> Sequence[str]:
         ex_rels = []
         direction, source, rel_type = triplet_info
         if source == "wiki":
@@ -242,14 +261,21 @@ class QueryGeneratorBase(Component, Serializable):
             ex_rels = self.wiki_parser(parser_info_list, queries_list)
             if self.use_api_requester and ex_rels:
                 ex_rels = [rel[0] for rel in ex_rels]
-            ex_rels = list(set(ex_rels))
-            ex_rels = [rel.split('/')[-1] for rel in ex_rels]
+            ex_rels = list({rel.rsplit('/', 1)[-1] for rel in ex_rels})
         elif source == "rank_list_1":
             ex_rels = self.rank_list_0
         elif source == "rank_list_2":
             ex_rels = self.rank_list_1
-        rels_with_scores = self.rel_ranker.rank_rels(question, ex_rels)
-        return rels_with_scores[:self.rels_to_leave]
+        return ex_rels
+
+    def find_top_rels(self, question: str, entity_ids: List[List[str]], triplet_info: Tuple) -> List[Tuple[str, Any]]:
+        return self.find_top_rels_batch(question, entity_ids, [triplet_info])[0]
+
+    def find_top_rels_batch(self, question: str, entity_ids: List[List[str]],
+                            triplet_info_list: List[Tuple]) -> List[List[Tuple[str, Any]]]:
+        ex_rels_list = [self.find_candidate_rels(entity_ids, triplet_info) for triplet_info in triplet_info_list]
+        rels_with_scores_list = self.rel_ranker.rank_rels_batch(question, ex_rels_list)
+        return [rels_with_scores[:self.rels_to_leave] for rels_with_scores in rels_with_scores_list]
 
     def find_answer_wikihow(self, howto_sentence: str) -> str:
         search_results = search(howto_sentence, 5)
@@ -103,12 +103,10 @@ class QueryGeneratorOnline(QueryGeneratorBase):
                              search_source != "do_not_rank"]
         log.debug(f"(query_parser)rel_directions: {triplet_info_list}")
         rel_variables = re.findall(":(r[\d]{1,2})", query)
-        entity_ids = [entity[:self.entities_to_leave] for entity in entity_ids]
         if rels_from_template is not None:
             rels = [[(rel, 1.0) for rel in rel_list] for rel_list in rels_from_template]
         else:
-            rels = [self.find_top_rels(question, entity_ids, triplet_info)
-                    for triplet_info in triplet_info_list]
+            rels = self.find_top_rels_batch(question, entity_ids, triplet_info_list)
         rels_list_for_filter = []
         rels_list_for_fill = []
         filter_rel_variables = []
@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import itertools
 from logging import getLogger
 from typing import Tuple, List, Any, Optional
 
@@ -165,26 +166,31 @@ class RelRankerBertInfer(Component, Serializable):
         return answers
 
     def rank_rels(self, question: str, candidate_rels: List[str]) -> List[Tuple[str, Any]]:
-        rels_with_scores = []
-        n_batches = len(candidate_rels) // self.batch_size + int(len(candidate_rels) % self.batch_size > 0)
-        for i in range(n_batches):
-            questions_batch = []
-            rels_labels_batch = []
-            rels_batch = []
-            for candidate_rel in candidate_rels[i * self.batch_size: (i + 1) * self.batch_size]:
-                if candidate_rel in self.rel_q2name:
-                    questions_batch.append(question)
-                    rels_batch.append(candidate_rel)
-                    rels_labels_batch.append(self.rel_q2name[candidate_rel])
-            if questions_batch:
-                if self.use_mt_bert:
-                    features = self.bert_preprocessor(questions_batch, rels_labels_batch)
-                    probas = self.ranker(features)
-                else:
-                    probas = self.ranker(questions_batch, rels_labels_batch)
-                probas = [proba[1] for proba in probas]
-                for j, rel in enumerate(rels_batch):
-                    rels_with_scores.append((rel, probas[j]))
-        rels_with_scores = sorted(rels_with_scores, key=lambda x: x[1], reverse=True)
-
-        return rels_with_scores[:self.rels_to_leave]
+        return self.rank_rels_batch(question, [candidate_rels])[0]
+
+    def rank_rels_batch(self, question: str, candidate_rels_list: List[List[str]]) -> List[List[Tuple[str, Any]]]:
+        """Ranks several lists of candidate relations for one question, scoring all of them in common batches"""
+        candidate_rels_list = [[rel for rel in candidate_rels if rel in self.rel_q2name]
+                               for candidate_rels in candidate_rels_list]
+        all_rels = list(itertools.chain.from_iterable(candidate_rels_list))
+        all_scores = []
+        for i in range(0, len(all_rels), self.batch_size):
+            rels_batch = all_rels[i: i + self.batch_size]
+            questions_batch = [question] * len(rels_batch)
+            rels_labels_batch = [self.rel_q2name[rel] for rel in rels_batch]
+            if self.use_mt_bert:
+                features = self.bert_preprocessor(questions_batch, rels_labels_batch)
+                probas = self.ranker(features)
+            else:
+                probas = self.ranker(questions_batch, rels_labels_batch)
+            all_scores += [proba[1] for proba in probas]
+
+        rels_with_scores_list = []
+        offset = 0
+        for candidate_rels in candidate_rels_list:
+            rels_with_scores = list(zip(candidate_rels, all_scores[offset: offset + len(candidate_rels)]))
+            offset += len(candidate_rels)
+            rels_with_scores = sorted(rels_with_scores, key=lambda x: x[1], reverse=True)
+            rels_with_scores_list.append(rels_with_scores[:self.rels_to_leave])
+
+        return rels_with_scores_list
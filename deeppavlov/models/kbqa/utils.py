@@ -14,30 +14,55 @@
 
 import re
 import itertools
-from typing import List, Tuple
+from typing import Any, Callable, List, Tuple
+
+import numpy as np
+
+
+# date formats in the order of priority, the last occurrence of the first found format is taken
+_YEAR_RES = [re.compile(r'.*\d{1,2}/\d{1,2}/(\d{4}).*'),
+             re.compile(r'.*\d{1,2}-\d{1,2}-(\d{4}).*'),
+             re.compile(r'.*(\d{4})-\d{1,2}-\d{1,2}.*')]
+_TOKEN_YEAR_RE = re.compile(r'\d{4}')
+_NUMBER_RE = re.compile(r'.*(\d\.\d+e\+\d+)\D*')
+
+# replacements are applied one after another, so later ones also see the results of earlier ones
+_QUESTION_REPLACEMENTS = [(' - ', '-'), (' .', ''), ('{', ''), ('}', ''), ('  ', ' '), ('"', "'"), ('(', ''),
+                          (')', ''), ('–', '-')]
+
+_QUERY_PREFIXES = {"P0": "http://schema.org/description",
+                   "wd:": "http://www.wikidata.org/entity/",
+                   "wdt:": "http://www.wikidata.org/prop/direct/",
+                   " p:": " http://www.wikidata.org/prop/",
+                   "ps:": "http://www.wikidata.org/prop/statement/",
+                   "pq:": "http://www.wikidata.org/prop/qualifier/"}
+_QUERY_SUBST_RE = re.compile("|".join(map(re.escape, _QUERY_PREFIXES)) + r"|([etr])(\d+)")
+
+
+def clean_question(question: str) -> str:
+    for old, new in _QUESTION_REPLACEMENTS:
+        question = question.replace(old, new)
+    return question
 
 
 def extract_year(question_tokens: List[str], question: str) -> str:
-    question_patterns = [r'.*\d{1,2}/\d{1,2}/(\d{4}).*', r'.*\d{1,2}-\d{1,2}-(\d{4}).*', r'.*(\d{4})-\d{1,2}-\d{1,2}.*']
-    token_patterns = [r'(\d{4})', r'^(\d{4})-.*', r'.*-(\d{4})$']
     year = ""
-    for pattern in question_patterns:
-        fnd = re.search(pattern, question)
+    for pattern in _YEAR_RES:
+        fnd = pattern.search(question)
         if fnd is not None:
             year = fnd.group(1)
             break
     else:
-        for token in question_tokens:
-            for pattern in token_patterns:
-                fnd = re.search(pattern, token)
-                if fnd is not None:
-                    return fnd.group(1)
+        # tokens never contain spaces, so a four-digit run cannot span two of them
+        fnd = _TOKEN_YEAR_RE.search(' '.join(question_tokens))
+        if fnd is not None:
+            year = fnd.group()
     return year
 
 
 def extract_number(question_tokens: List[str], question: str) -> str:
     number = ""
-    fnd = re.search(r'.*(\d\.\d+e\+\d+)\D*', question)
+    fnd = _NUMBER_RE.search(question)
     if fnd is not None:
         number = fnd.group(1)
     else:
@@ -64,45 +89,75 @@ def order_of_answers_sorting(question: str) -> str:
 
 
 def make_combs(entity_ids: List[List[str]], permut: bool) -> List[List[str]]:
-    entity_ids = [[(entity, n) for n, entity in enumerate(entities_list)] for entities_list in entity_ids]
-    entity_ids = list(itertools.product(*entity_ids))
-    entity_ids_permut = []
+    if not entity_ids:
+        return [[0]]
+    offsets = np.cumsum([0] + [len(entities_list) for entities_list in entity_ids[:-1]])
+    flat_entities = np.empty(sum(len(entities_list) for entities_list in entity_ids), dtype=object)
+    for n, entity in enumerate(itertools.chain.from_iterable(entity_ids)):
+        flat_entities[n] = entity
+    # rank_grid[i] holds positions of the entities of i-th combination in corresponding lists
+    ranks = [np.arange(len(entities_list)) for entities_list in entity_ids]
+    rank_grid = np.stack(np.meshgrid(*ranks, indexing='ij'), -1).reshape(-1, len(entity_ids))
+    ids_grid = rank_grid + offsets
     if permut:
-        for comb in entity_ids:
-            entity_ids_permut += itertools.permutations(comb)
-    else:
-        entity_ids_permut = entity_ids
-    entity_ids = sorted(entity_ids_permut, key=lambda x: sum([elem[1] for elem in x]))
-    ent_combs = [[elem[0] for elem in comb] + [sum([elem[1] for elem in comb])] for comb in entity_ids]
+        perms = list(itertools.permutations(range(len(entity_ids))))
+        ids_grid = np.stack([ids_grid[:, perm] for perm in perms], 1).reshape(-1, len(entity_ids))
+        rank_grid = np.repeat(rank_grid, len(perms), axis=0)
+    rank_sums = rank_grid.sum(axis=1)
+    order = np.argsort(rank_sums, kind='stable')
+    ent_combs = [comb + [rank_sum] for comb, rank_sum in
+                 zip(flat_entities[ids_grid[order]].tolist(), rank_sums[order].tolist())]
     return ent_combs
 
 
+def make_query_filler(query: List[str]) -> Callable[[List[str], List[str], List[Tuple[str, Any]]], List[str]]:
+    """Parses the query once and returns a function which fills it with entities, types and relations
+
+    The query is split into literal parts (with wikidata prefixes already expanded) and placeholders,
+    so that filling the query for each combination of candidates is a single join.
+    """
+    query = " ".join(query)
+    segments = []
+    start = 0
+    for match in _QUERY_SUBST_RE.finditer(query):
+        literal = query[start:match.start()]
+        placeholder_type, placeholder_num = match.group(1, 2)
+        if placeholder_type is None:
+            literal += _QUERY_PREFIXES[match.group()]
+        if segments and isinstance(segments[-1], str):
+            segments[-1] += literal
+        else:
+            segments.append(literal)
+        if placeholder_type is not None:
+            segments.append((placeholder_type, int(placeholder_num) - 1, match.group()))
+        start = match.end()
+    segments.append(query[start:])
+
+    def filler(entity_comb: List[str], type_comb: List[str], rel_comb: List[Tuple[str, Any]]) -> List[str]:
+        # the last element of each combination is the sum of ranks of its candidates
+        combs = {"e": entity_comb, "t": type_comb, "r": [rel for rel, score in rel_comb[:-1]] + [None]}
+        filled_query = []
+        for segment in segments:
+            if isinstance(segment, str):
+                filled_query.append(segment)
+            else:
+                placeholder_type, num, placeholder = segment
+                comb = combs[placeholder_type]
+                filled_query.append(comb[num] if 0 <= num < len(comb) - 1 else placeholder)
+        filled_query = "".join(filled_query)
+        filled_query = filled_query.replace("http://www.wikidata.org/prop/direct/P0", "http://schema.org/description")
+        return filled_query.split(' ')
+
+    return filler
+
+
 def fill_query(query: List[str], entity_comb: List[str], type_comb: List[str], rel_comb: List[str]) -> List[str]:
     ''' example of query: ["wd:E1", "p:R1", "?s"]
                    entity_comb: ["Q159"]
                    type_comb: []
                    rel_comb: ["P17"]
     '''
-    query = " ".join(query)
-    map_query_str_to_wikidata = [("P0", "http://schema.org/description"),
-                                 ("wd:", "http://www.wikidata.org/entity/"),
-                                 ("wdt:", "http://www.wikidata.org/prop/direct/"),
-                                 (" p:", " http://www.wikidata.org/prop/"),
-                                 ("wdt:", "http://www.wikidata.org/prop/direct/"),
-                                 ("ps:", "http://www.wikidata.org/prop/statement/"),
-                                 ("pq:", "http://www.wikidata.org/prop/qualifier/")]
-
-    for query_str, wikidata_str in map_query_str_to_wikidata:
-        query = query.replace(query_str, wikidata_str)
-    for n, entity in enumerate(entity_comb[:-1]):
-        query = query.replace(f"e{n + 1}", entity)
-    for n, entity_type in enumerate(type_comb[:-1]):  # type_entity
-        query = query.replace(f"t{n + 1}", entity_type)
-    for n, (rel, score) in enumerate(rel_comb[:-1]):
-        query = query.replace(f"r{n + 1}", rel)
-    query = query.replace("http://www.wikidata.org/prop/direct/P0", "http://schema.org/description")
-    query = query.split(' ')
-    return query
+    return make_query_filler(query)(entity_comb, type_comb, rel_comb)
 
 
 def fill_online_query(query: List[str], entity_comb: List[str], type_comb: List[str],
@@ -13,10 +13,14 @@
 # limitations under the License.
 
 import datetime
+import multiprocessing as mp
 import re
+from functools import lru_cache
+from itertools import islice
+from operator import itemgetter
 from logging import getLogger
-from typing import List, Tuple, Dict, Any, Union
-from collections import namedtuple
+from typing import List, Tuple, Dict, Any, Iterator, Union
+from collections import deque, namedtuple
 
 from hdt import HDTDocument
 
@@ -26,18 +30,39 @@ from deeppavlov.core.common.registry import register
 
 log = getLogger(__name__)
 
+_worker_parser = None
+
+
+def _init_worker(wiki_filename: str, file_format: str, lang: str, order_triplets: bool) -> None:
+    global _worker_parser
+    _worker_parser = WikiParser(wiki_filename, file_format, lang, order_triplets=order_triplets)
+
+
+def _execute_query(query: Tuple) -> List[List[str]]:
+    return _worker_parser.execute(*query)
+
 
 @register('wiki_parser')
 class WikiParser:
     """This class extract relations, objects or triplets from Wikidata HDT file"""
 
-    def __init__(self, wiki_filename: str, file_format: str = "hdt", lang: str = "@en", **kwargs) -> None:
+    _ENTITY_PREFIX = "http://www.wikidata.org/entity/"
+    _PROP_PREFIX = "http://www.wikidata.org/prop/"
+    _LABEL_REL = "http://www.w3.org/2000/01/rdf-schema#label"
+    _ALIAS_REL = "http://www.w3.org/2004/02/skos/core#altLabel"
+
+    def __init__(self, wiki_filename: str, file_format: str = "hdt", lang: str = "@en",
+                 n_workers: int = 1, order_triplets: bool = False, **kwargs) -> None:
         """
 
         Args:
             wiki_filename: file with Wikidata
             file_format: format of Wikidata file
             lang: Russian or English language
+            n_workers: number of processes for execution of queries, each of them opens its own Wikidata file
+            order_triplets: whether to join triplets of a query starting from the one with the fewest matches
+                in the HDT file instead of the template order. Costs an extra search per triplet and can change
+                the order of answers with equal sorting values
             **kwargs:
         """
         self.description_rel = "http://schema.org/description"
@@ -51,8 +76,21 @@ class WikiParser:
         else:
             raise ValueError("Unsupported file format")
         self.lang = lang
+        self.order_triplets = order_triplets
+        # knowledge base is read-only, so relations, labels and aliases of entities can be memoized across questions
+        self.find_rels = lru_cache(maxsize=8192)(self.find_rels)
+        self.find_label = lru_cache(maxsize=65536)(self.find_label)
+        self.find_alias = lru_cache(maxsize=8192)(self.find_alias)
+        self.n_workers = n_workers
+        self.pool = None
+        if self.n_workers > 1:
+            self.pool = mp.Pool(self.n_workers, initializer=_init_worker,
+                                initargs=(self.wiki_filename, self.file_format, self.lang, self.order_triplets))
 
     def __call__(self, parser_info_list: List[str], queries_list: List[Any]) -> List[Any]:
+        if self.pool is not None and parser_info_list and \
+                all(parser_info == "query_execute" for parser_info in parser_info_list):
+            return self.execute_queries(queries_list)
         wiki_parser_output = []
         for parser_info, query in zip(parser_info_list, queries_list):
             if parser_info == "query_execute":
@@ -79,6 +117,35 @@ class WikiParser:
                 raise ValueError("Unsupported query type")
         return wiki_parser_output
 
+    def execute_queries(self, queries_list: List[Tuple]) -> List[List[List[str]]]:
+        """Executes queries in worker processes. If an answer found by a query with `return_if_found` flag
+        should stop the execution, at most ``2 * n_workers`` queries are submitted ahead of the current one,
+        otherwise all the queries are distributed among workers in chunks at once
+        """
+        if not any(query[-1] for query in queries_list):
+            chunksize = max(len(queries_list) // (4 * self.n_workers), 1)
+            return self.pool.map(_execute_query, [query[:-1] for query in queries_list], chunksize)
+
+        wiki_parser_output = []
+        queries_iter = iter(queries_list)
+        pending = deque((query[-1], self.pool.apply_async(_execute_query, (query[:-1],)))
+                        for query in islice(queries_iter, 2 * self.n_workers))
+        while pending:
+            return_if_found, result = pending.popleft()
+            candidate_output = result.get()
+            wiki_parser_output.append(candidate_output)
+            if return_if_found and candidate_output:
+                return wiki_parser_output
+            for query in islice(queries_iter, 1):
+                pending.append((query[-1], self.pool.apply_async(_execute_query, (query[:-1],))))
+        return wiki_parser_output
+
+    def destroy(self) -> None:
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
     def execute(self, what_return: List[str],
                 query_seq: List[List[str]],
                 filter_info: List[Tuple[str]] = None,
@@ -99,6 +166,8 @@ class WikiParser:
         extended_combs = []
         combs = []
         if "qualifier" not in filter_info:
+            if self.order_triplets and self.file_format == "hdt" and len(query_seq) > 1:
+                query_seq = self.order_by_selectivity(query_seq)
             for n, query in enumerate(query_seq):
                 unknown_elem_positions = [(pos, elem) for pos, elem in enumerate(query) if elem.startswith('?')]
                 """
@@ -116,11 +185,11 @@ class WikiParser:
                     # combs = [{"?ent": "http://www.wikidata.org/entity/Q5513"}, ...]
                 else:
                     if combs:
-                        known_elements = []
                         extended_combs = []
-                        for elem in query:
-                            if elem in combs[0].keys():
-                                known_elements.append(elem)
+                        known_elements = [elem for elem in query if elem in combs[0]]
+                        unknown_elems = [elem for pos, elem in unknown_elem_positions]
+                        # positions of the query which contain each known element do not depend on the comb
+                        known_masks = [[known_elem in elem for elem in query] for known_elem in known_elements]
                         for comb in combs:
                             """
                                 n = 1
@@ -136,47 +205,85 @@ class WikiParser:
                                               "http://www.wikidata.org/entity/Q23397"], ...]
                                 extended_combs = [{"?ent": "http://www.wikidata.org/entity/Q5513"}, ...]
                             """
-                            known_values = [comb[known_elem] for known_elem in known_elements]
-                            for known_elem, known_value in zip(known_elements, known_values):
-                                filled_query = [elem.replace(known_elem, known_value) for elem in query]
-                                new_combs = self.search(filled_query, unknown_elem_positions)
-                                for new_comb in new_combs:
-                                    extended_combs.append({**comb, **new_comb})
+                            for known_elem, known_mask in zip(known_elements, known_masks):
+                                known_value = comb[known_elem]
+                                filled_query = [elem.replace(known_elem, known_value) if has_known_elem else elem
+                                                for elem, has_known_elem in zip(query, known_mask)]
+                                # found values are merged into the comb directly, without intermediate dicts
+                                for values in self.search_values(filled_query, unknown_elem_positions):
+                                    new_comb = comb.copy()
+                                    new_comb.update(zip(unknown_elems, values))
+                                    extended_combs.append(new_comb)
                     combs = extended_combs
 
         if combs:
             if filter_info:
-                for filter_elem, filter_value in filter_info:
-                    combs = [comb for comb in combs if filter_value in comb[filter_elem]]
+                combs = [comb for comb in combs
+                         if all(filter_value in comb[filter_elem] for filter_elem, filter_value in filter_info)]
 
             if order_info and not isinstance(order_info, list) and order_info.variable is not None:
-                reverse = True if order_info.sorting_order == "desc" else False
                 sort_elem = order_info.variable
-                for i in range(len(combs)):
-                    value_str = combs[i][sort_elem].split('^^')[0].strip('"')
+
+                def sort_value(comb):
+                    value_str = comb[sort_elem].split('^^')[0].strip('"')
                     if value_str.endswith("T00:00:00Z"):
-                        value_str = value_str.strip("T00:00:00Z")
-                        combs[i][sort_elem] = value_str
-                    else:
-                        combs[i][sort_elem] = float(value_str)
-                combs = sorted(combs, key=lambda x: x[sort_elem], reverse=reverse)
-                combs = [combs[0]]
+                        return value_str.strip("T00:00:00Z")
+                    return float(value_str)
+
+                # only the top combination is kept, so a linear scan is enough instead of a full sort
+                if order_info.sorting_order == "desc":
+                    best_comb = max(combs, key=sort_value)
+                else:
+                    best_comb = min(combs, key=sort_value)
+                best_comb[sort_elem] = sort_value(best_comb)
+                combs = [best_comb]
 
             if what_return[-1].startswith("count"):
                 combs = [[combs[0][key] for key in what_return[:-1]] + [len(combs)]]
+            elif len(what_return) == 1:
+                get_values = itemgetter(what_return[0])
+                combs = [[get_values(elem)] for elem in combs]
             else:
-                combs = [[elem[key] for key in what_return] for elem in combs]
+                get_values = itemgetter(*what_return)
+                combs = [list(get_values(elem)) for elem in combs]
 
         return combs
 
+    def order_by_selectivity(self, query_seq: List[List[str]]) -> List[List[str]]:
+        """Reorders triplets of the query so that the join starts from the triplet with the fewest matches
+        in the knowledge base and every next triplet shares a variable with the already searched ones
+        """
+        cardinalities = {}
+        for query in query_seq:
+            if tuple(query) not in cardinalities:
+                triplets, c = self.document.search_triples(*["" if elem.startswith('?') else elem for elem in query])
+                cardinalities[tuple(query)] = c
+
+        ordered_query_seq = []
+        remaining = list(query_seq)
+        known_variables = set()
+        while remaining:
+            connected = [query for query in remaining
+                         if known_variables.intersection(elem for elem in query if elem.startswith('?'))]
+            query = min(connected or remaining, key=lambda query: cardinalities[tuple(query)])
+            remaining.remove(query)
+            ordered_query_seq.append(query)
+            known_variables.update(elem for elem in query if elem.startswith('?'))
+        return ordered_query_seq
+
     def search(self, query: List[str], unknown_elem_positions: List[Tuple[int, str]]) -> List[Dict[str, str]]:
+        unknown_elems = [elem for pos, elem in unknown_elem_positions]
+        return [dict(zip(unknown_elems, values)) for values in self.search_values(query, unknown_elem_positions)]
+
+    def search_values(self, query: List[str],
+                      unknown_elem_positions: List[Tuple[int, str]]) -> Iterator[Tuple[str, ...]]:
+        """Lazily yields values of unknown elements of the query for each triplet found"""
         query = list(map(lambda elem: "" if elem.startswith('?') else elem, query))
         subj, rel, obj = query
         if self.file_format == "hdt":
             triplets, c = self.document.search_triples(subj, rel, obj)
             if rel == self.description_rel:
-                triplets = [triplet for triplet in triplets if triplet[2].endswith(self.lang)]
-            combs = [{elem: triplet[pos] for pos, elem in unknown_elem_positions} for triplet in triplets]
+                triplets = (triplet for triplet in triplets if triplet[2].endswith(self.lang))
         else:
             if subj:
                 subj, triplets = self.find_triplets(subj, "forw")
@@ -190,29 +297,29 @@ class WikiParser:
                 else:
                     rel = rel.split('/')[-1]
                     triplets = [triplet for triplet in triplets if triplet[1] == rel]
-            combs = [{elem: triplet[pos] for pos, elem in unknown_elem_positions} for triplet in triplets]
-        return combs
+        positions = [pos for pos, elem in unknown_elem_positions]
+        return (tuple(triplet[pos] for pos in positions) for triplet in triplets)
 
     def find_label(self, entity: str, question: str) -> str:
         entity = str(entity).replace('"', '')
         if self.file_format == "hdt":
             if entity.startswith("Q"):
                 # example: "Q5513"
-                entity = "http://www.wikidata.org/entity/" + entity
+                entity = self._ENTITY_PREFIX + entity
                 # "http://www.wikidata.org/entity/Q5513"
 
-            if entity.startswith("http://www.wikidata.org/entity/"):
-                labels, c = self.document.search_triples(entity, "http://www.w3.org/2000/01/rdf-schema#label", "")
+            if entity.startswith(self._ENTITY_PREFIX):
+                labels, c = self.document.search_triples(entity, self._LABEL_REL, "")
                 # labels = [["http://www.wikidata.org/entity/Q5513", "http://www.w3.org/2000/01/rdf-schema#label",
                 #                                                    '"Lake Baikal"@en'], ...]
                 for label in labels:
                     if label[2].endswith(self.lang):
-                        found_label = label[2].strip(self.lang).replace('"', '')
+                        found_label = label[2][:-len(self.lang)].replace('"', '')
                         return found_label
 
             elif entity.endswith(self.lang):
                 # entity: '"Lake Baikal"@en'
-                entity = entity[:-3]
+                entity = entity[:-len(self.lang)]
                 return entity
 
             elif "^^" in entity:
@@ -260,25 +367,25 @@ class WikiParser:
 
     def find_alias(self, entity: str) -> List[str]:
         aliases = []
-        if entity.startswith("http://www.wikidata.org/entity/"):
-            labels, cardinality = self.document.search_triples(entity,
-                                                               "http://www.w3.org/2004/02/skos/core#altLabel", "")
-            aliases = [label[2].strip(self.lang).strip('"') for label in labels if label[2].endswith(self.lang)]
+        if entity.startswith(self._ENTITY_PREFIX):
+            labels, cardinality = self.document.search_triples(entity, self._ALIAS_REL, "")
+            # label literals look like '"Lake Baikal"@en', so quotes and language tag are cut off by slicing
+            aliases = [label[2][1:-len(self.lang) - 1] for label in labels if label[2].endswith(self.lang)]
         return aliases
 
     def find_rels(self, entity: str, direction: str, rel_type: str = "no_type") -> List[str]:
         rels = []
         if self.file_format == "hdt":
+            entity_uri = self._ENTITY_PREFIX + entity
             if direction == "forw":
-                query = [f"http://www.wikidata.org/entity/{entity}", "", ""]
+                triplets, c = self.document.search_triples(entity_uri, "", "")
             else:
-                query = ["", "", f"http://www.wikidata.org/entity/{entity}"]
-            triplets, c = self.document.search_triples(*query)
+                triplets, c = self.document.search_triples("", "", entity_uri)
 
             if rel_type != "no_type":
-                start_str = f"http://www.wikidata.org/prop/{rel_type}"
+                start_str = self._PROP_PREFIX + rel_type
             else:
-                start_str = "http://www.wikidata.org/prop/P"
+                start_str = self._PROP_PREFIX + "P"
             rels = [triplet[1] for triplet in triplets if triplet[1].startswith(start_str)]
         if self.file_format == "pickle":
             triplets = self.document.get(entity, {}).get(direction, [])
@@ -13,8 +13,9 @@
 # limitations under the License.
 import re
 import random
+from functools import lru_cache
 from logging import getLogger
-from typing import Tuple, List, Optional, Union
+from typing import Callable, Tuple, List, Optional, Union
 
 from bert_dp.preprocessing import convert_examples_to_features, InputExample, InputFeatures
 from bert_dp.tokenization import FullTokenizer
@@ -27,6 +28,8 @@ from deeppavlov.models.preprocessors.mask import Mask
 
 log = getLogger(__name__)
 
+_NER_WORD_RE = re.compile(r"[\w']+|[^\w ]")
+
 
 @register('bert_preprocessor')
 class BertPreprocessor(Component):
@@ -109,7 +112,6 @@ class BertNerPreprocessor(Component):
                  provide_subword_tags: bool = False,
                  subword_mask_mode: str = "first",
                  **kwargs):
-        self._re_tokenizer = re.compile(r"[\w']+|[^\w ]")
         self.provide_subword_tags = provide_subword_tags
         self.mode = kwargs.get('mode')
         self.max_seq_length = max_seq_length
@@ -118,6 +120,8 @@ class BertNerPreprocessor(Component):
         vocab_file = str(expand_path(vocab_file))
         self.tokenizer = FullTokenizer(vocab_file=vocab_file,
                                        do_lower_case=do_lower_case)
+        # words repeat heavily across sentences, so each distinct word is split into subtokens only once
+        self._tokenize_word = lru_cache(maxsize=2 ** 16)(self.tokenizer.tokenize)
         self.token_masking_prob = token_masking_prob
 
     def __call__(self,
@@ -125,7 +129,7 @@ class BertNerPreprocessor(Component):
                  tags: List[List[str]] = None,
                  **kwargs):
         if isinstance(tokens[0], str):
-            tokens = [re.findall(self._re_tokenizer, s) for s in tokens]
+            tokens = [_NER_WORD_RE.findall(s) for s in tokens]
         subword_tokens, subword_tok_ids, startofword_markers, subword_tags = [], [], [], []
         for i in range(len(tokens)):
             toks = tokens[i]
@@ -135,7 +139,7 @@ class BertNerPreprocessor(Component):
             sw_toks, sw_marker, sw_ys = \
                 self._ner_bert_tokenize(toks,
                                         ys,
-                                        self.tokenizer,
+                                        self._tokenize_word,
                                         self.max_subword_length,
                                         mode=self.mode,
                                         subword_mask_mode=self.subword_mask_mode,
@@ -179,7 +183,7 @@ class BertNerPreprocessor(Component):
     @staticmethod
     def _ner_bert_tokenize(tokens: List[str],
                            tags: List[str],
-                           tokenizer: FullTokenizer,
+                           tokenize: Callable[[str], List[str]],
                            max_subword_len: int = None,
                            mode: str = None,
                            subword_mask_mode: str = "first",
@@ -191,7 +195,7 @@ class BertNerPreprocessor(Component):
         tags_subword = ['X']
         for token, tag in zip(tokens, tags):
             token_marker = int(tag != 'X')
-            subwords = tokenizer.tokenize(token)
+            subwords = tokenize(token)
             if not subwords or (do_cutting and (len(subwords) > max_subword_len)):
                 tokens_subword.append('[UNK]')
                 startofword_markers.append(token_marker)
@@ -77,6 +77,5 @@ class OneHotter(Component):
     @staticmethod
     def _to_one_hot(x, n):
         b = np.zeros([len(x), n], dtype=np.float32)
-        for q, tok in enumerate(x):
-            b[q, int(tok)] = 1
+        b[np.arange(len(x)), np.asarray(x).astype(int)] = 1
         return b
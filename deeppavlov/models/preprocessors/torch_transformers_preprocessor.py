@@ -14,22 +14,25 @@
 
 import re
 import random
+from functools import lru_cache
 from logging import getLogger
 from pathlib import Path
 import torch
-from typing import Tuple, List, Optional, Union
+from typing import Callable, Tuple, List, Optional, Union
 
 from transformers import AutoTokenizer
 from transformers.data.processors.utils import InputFeatures
 
 from deeppavlov.core.commands.utils import expand_path
 from deeppavlov.core.common.registry import register
-from deeppavlov.core.data.utils import zero_pad
+from deeppavlov.core.data.utils import zero_pad_truncate
 from deeppavlov.core.models.component import Component
 from deeppavlov.models.preprocessors.mask import Mask
 
 log = getLogger(__name__)
 
+_NER_WORD_RE = re.compile(r"[\w']+|[^\w ]")
+
 
 @register('torch_transformers_preprocessor')
 class TorchTransformersPreprocessor(Component):
@@ -63,7 +66,7 @@ class TorchTransformersPreprocessor(Component):
             self.tokenizer = AutoTokenizer(vocab_file=vocab_file,
                                            do_lower_case=do_lower_case)
         else:
-            self.tokenizer = AutoTokenizer.from_pretrained(vocab_file, do_lower_case=do_lower_case)
+            self.tokenizer = AutoTokenizer.from_pretrained(vocab_file, do_lower_case=do_lower_case, use_fast=True)
 
     def __call__(self, texts_a: List[str], texts_b: Optional[List[str]] = None) -> Union[
             List[InputFeatures], Tuple[List[InputFeatures], List[List[str]]]]:
@@ -81,25 +84,30 @@ class TorchTransformersPreprocessor(Component):
         """
 
         if texts_b is None:
-            texts_b = [None] * len(texts_a)
+            batch = list(texts_a)
+        else:
+            batch = list(zip(texts_a, texts_b))
+
+        # the whole batch is encoded in a single call, which lets the tokenizer process it at once
+        encoded_dict = self.tokenizer.batch_encode_plus(
+            batch, add_special_tokens=True, max_length=self.max_seq_length,
+            pad_to_max_length=True, return_tensors='pt')
 
         input_features = []
         tokens = []
-        for text_a, text_b in zip(texts_a, texts_b):
-            encoded_dict = self.tokenizer.encode_plus(
-                text=text_a, text_pair=text_b, add_special_tokens=True, max_length=self.max_seq_length,
-                pad_to_max_length=True, return_attention_mask=True, return_tensors='pt')
-
-            if 'token_type_ids' not in encoded_dict:
-                encoded_dict['token_type_ids'] = torch.tensor([0])
+        for i in range(len(batch)):
+            if 'token_type_ids' in encoded_dict:
+                token_type_ids = encoded_dict['token_type_ids'][i:i + 1]
+            else:
+                token_type_ids = torch.tensor([0])
 
-            curr_features = InputFeatures(input_ids=encoded_dict['input_ids'],
-                                          attention_mask=encoded_dict['attention_mask'],
-                                          token_type_ids=encoded_dict['token_type_ids'],
+            curr_features = InputFeatures(input_ids=encoded_dict['input_ids'][i:i + 1],
+                                          attention_mask=encoded_dict['attention_mask'][i:i + 1],
+                                          token_type_ids=token_type_ids,
                                           label=None)
             input_features.append(curr_features)
             if self.return_tokens:
-                tokens.append(self.tokenizer.convert_ids_to_tokens(encoded_dict['input_ids'][0]))
+                tokens.append(self.tokenizer.convert_ids_to_tokens(encoded_dict['input_ids'][i].tolist()))
 
         if self.return_tokens:
             return input_features, tokens
@@ -140,7 +148,6 @@ class TorchBertNerPreprocessor(Component):
                  provide_subword_tags: bool = False,
                  subword_mask_mode: str = "first",
                  **kwargs):
-        self._re_tokenizer = re.compile(r"[\w']+|[^\w ]")
         self.provide_subword_tags = provide_subword_tags
         self.mode = kwargs.get('mode')
         self.max_seq_length = max_seq_length
@@ -152,6 +159,11 @@ class TorchBertNerPreprocessor(Component):
                                            do_lower_case=do_lower_case)
         else:
             self.tokenizer = AutoTokenizer.from_pretrained(vocab_file, do_lower_case=True)
+        # words repeat heavily across sentences, so each distinct word is split into subtokens only once
+        self._tokenize_word = lru_cache(maxsize=2 ** 16)(self.tokenizer.tokenize)
+        # subtokens are mapped to ids with a plain dict lookup instead of a tokenizer call per subtoken
+        self._token2id = self.tokenizer.get_vocab()
+        self._unk_token_id = self._token2id[self.tokenizer.unk_token]
         self.token_masking_prob = token_masking_prob
 
     def __call__(self,
@@ -159,7 +171,7 @@ class TorchBertNerPreprocessor(Component):
                  tags: List[List[str]] = None,
                  **kwargs):
         if isinstance(tokens[0], str):
-            tokens = [re.findall(self._re_tokenizer, s) for s in tokens]
+            tokens = [_NER_WORD_RE.findall(s) for s in tokens]
         subword_tokens, subword_tok_ids, startofword_markers, subword_tags = [], [], [], []
         for i in range(len(tokens)):
             toks = tokens[i]
@@ -169,7 +181,7 @@ class TorchBertNerPreprocessor(Component):
             sw_toks, sw_marker, sw_ys = \
                 self._ner_bert_tokenize(toks,
                                         ys,
-                                        self.tokenizer,
+                                        self._tokenize_word,
                                         self.max_subword_length,
                                         mode=self.mode,
                                         subword_mask_mode=self.subword_mask_mode,
@@ -179,15 +191,16 @@ class TorchBertNerPreprocessor(Component):
                     raise RuntimeError(f"input sequence after bert tokenization"
                                        f" shouldn't exceed {self.max_seq_length} tokens.")
             subword_tokens.append(sw_toks)
-            subword_tok_ids.append(self.tokenizer.convert_tokens_to_ids(sw_toks))
+            subword_tok_ids.append([self._token2id.get(tok, self._unk_token_id) for tok in sw_toks])
             startofword_markers.append(sw_marker)
             subword_tags.append(sw_ys)
             assert len(sw_marker) == len(sw_toks) == len(subword_tok_ids[-1]) == len(sw_ys), \
                 f"length of sow_marker({len(sw_marker)}), tokens({len(sw_toks)})," \
                 f" token ids({len(subword_tok_ids[-1])}) and ys({len(ys)})" \
                 f" for tokens = `{toks}` should match"
-        subword_tok_ids = zero_pad(subword_tok_ids, dtype=int, padding=0)
-        startofword_markers = zero_pad(startofword_markers, dtype=int, padding=0)
+        max_len = max(len(sw_toks) for sw_toks in subword_tokens)
+        subword_tok_ids = zero_pad_truncate(subword_tok_ids, max_len, dtype=int)
+        startofword_markers = zero_pad_truncate(startofword_markers, max_len, dtype=int)
         attention_mask = Mask()(subword_tokens)
 
         if tags is not None:
@@ -213,7 +226,7 @@ class TorchBertNerPreprocessor(Component):
     @staticmethod
     def _ner_bert_tokenize(tokens: List[str],
                            tags: List[str],
-                           tokenizer: AutoTokenizer,
+                           tokenize: Callable[[str], List[str]],
                            max_subword_len: int = None,
                            mode: str = None,
                            subword_mask_mode: str = "first",
@@ -225,7 +238,7 @@ class TorchBertNerPreprocessor(Component):
         tags_subword = ['X']
         for token, tag in zip(tokens, tags):
             token_marker = int(tag != 'X')
-            subwords = tokenizer.tokenize(token)
+            subwords = tokenize(token)
             if not subwords or (do_cutting and (len(subwords) > max_subword_len)):
                 tokens_subword.append('[UNK]')
                 startofword_markers.append(token_marker)
@@ -268,33 +281,28 @@ class TorchBertRankerPreprocessor(TorchTransformersPreprocessor):
         if isinstance(batch[0], str):
             batch = [batch]
 
-        cont_resp_pairs = []
         if len(batch[0]) == 1:
-            contexts = batch[0]
-            responses_empt = [None] * len(batch)
-            cont_resp_pairs.append(zip(contexts, responses_empt))
+            cont_resp_pairs = [batch[0]]
         else:
             contexts = [el[0] for el in batch]
-            for i in range(1, len(batch[0])):
-                responses = []
-                for el in batch:
-                    responses.append(el[i])
-                cont_resp_pairs.append(zip(contexts, responses))
+            cont_resp_pairs = [list(zip(contexts, [el[i] for el in batch])) for i in range(1, len(batch[0]))]
 
-        input_features = []
+        # pairs for all the response candidates are encoded in a single call and split back afterwards
+        encoded_dict = self.tokenizer.batch_encode_plus(
+            [pair for s in cont_resp_pairs for pair in s], add_special_tokens=True, max_length=self.max_seq_length,
+            pad_to_max_length=True, return_tensors='pt')
 
+        input_features = []
+        offset = 0
         for s in cont_resp_pairs:
             sub_list_features = []
-            for context, response in s:
-                encoded_dict = self.tokenizer.encode_plus(
-                    text=context, text_pair=response, add_special_tokens=True, max_length=self.max_seq_length,
-                    pad_to_max_length=True, return_attention_mask=True, return_tensors='pt')
-
-                curr_features = InputFeatures(input_ids=encoded_dict['input_ids'],
-                                              attention_mask=encoded_dict['attention_mask'],
-                                              token_type_ids=encoded_dict['token_type_ids'],
+            for i in range(offset, offset + len(s)):
+                curr_features = InputFeatures(input_ids=encoded_dict['input_ids'][i:i + 1],
+                                              attention_mask=encoded_dict['attention_mask'][i:i + 1],
+                                              token_type_ids=encoded_dict['token_type_ids'][i:i + 1],
                                               label=None)
                 sub_list_features.append(curr_features)
             input_features.append(sub_list_features)
+            offset += len(s)
 
         return input_features
@@ -70,13 +70,14 @@ class ErrorModel(Estimator):
     def _find_candidates_window_0(self, word, prop_threshold=1e-6):
         threshold = log(prop_threshold)
         d = {}
-        prefixes_heap = [(0, {''})]
+        words_trie = self.dictionary.words_trie
+        prefixes_heap = [(0, [('', words_trie.ROOT)])]
         candidates = [(float('-inf'), '') for _ in range(self.candidates_count)]
         word = '⟬{}⟭'.format(word.lower().replace('ё', 'е'))
         word_len = len(word) + 1
         while prefixes_heap and -prefixes_heap[0][0] > candidates[0][0]:
             _, prefixes = heappop(prefixes_heap)
-            for prefix in prefixes:
+            for prefix, node in prefixes:
                 res = []
                 for i in range(word_len):
                     c = word[i - 1:i]
@@ -92,7 +93,7 @@ class ErrorModel(Estimator):
                     heappushpop(candidates, (res[-1], prefix))
                 potential = max(res)
                 if potential > threshold:
-                    heappush(prefixes_heap, (-potential, self.dictionary.words_trie[prefix]))
+                    heappush(prefixes_heap, (-potential, words_trie.expand(prefix, node)))
         return [(w.strip('⟬⟭'), score) for score, w in sorted(candidates, reverse=True) if
                 score > threshold]
 
@@ -103,11 +104,12 @@ class ErrorModel(Estimator):
         inf = float('-inf')
         d = defaultdict(list)
         d[''] = [0.] + [inf] * (word_len - 1)
-        prefixes_heap = [(0, self.dictionary.words_trie[''])]
+        words_trie = self.dictionary.words_trie
+        prefixes_heap = [(0, words_trie.expand('', words_trie.ROOT))]
         candidates = [(inf, '')] * self.candidates_count
         while prefixes_heap and -prefixes_heap[0][0] > candidates[0][0]:
             _, prefixes = heappop(prefixes_heap)
-            for prefix in prefixes:
+            for prefix, node in prefixes:
                 prefix_len = len(prefix)
                 d[prefix] = res = [inf]
                 for i in range(1, word_len):
@@ -127,7 +129,7 @@ class ErrorModel(Estimator):
                 # potential = max(
                 #     [e for i in range(self.window + 2) for e in d[prefix[:prefix_len - i]]])
                 if potential > threshold:
-                    heappush(prefixes_heap, (-potential, self.dictionary.words_trie[prefix]))
+                    heappush(prefixes_heap, (-potential, words_trie.expand(prefix, node)))
         return [(w.strip('⟬⟭'), score) for score, w in sorted(candidates, reverse=True) if
                 score > threshold]
 
@@ -49,6 +49,7 @@ class TorchTransformersClassifierModel(TorchModel):
                               e.g. {'lr': 0.1, 'weight_decay': 0.001, 'momentum': 0.9}
         clip_norm: clip gradients by norm coefficient
         bert_config_file: path to Bert configuration file (not used if pretrained_bert is key title)
+        amp: whether to run inference with automatic mixed precision (float16, only on `cuda` device)
     """
 
     def __init__(self, n_classes,
@@ -62,6 +63,7 @@ class TorchTransformersClassifierModel(TorchModel):
                  optimizer_parameters: dict = {"lr": 1e-3, "weight_decay": 0.01, "betas": (0.9, 0.999), "eps": 1e-6},
                  clip_norm: Optional[float] = None,
                  bert_config_file: Optional[str] = None,
+                 amp: bool = False,
                  **kwargs) -> None:
 
         self.return_probas = return_probas
@@ -73,6 +75,7 @@ class TorchTransformersClassifierModel(TorchModel):
         self.hidden_keep_prob = hidden_keep_prob
         self.n_classes = n_classes
         self.clip_norm = clip_norm
+        self.amp = amp
 
         if self.multilabel and not self.one_hot_labels:
             raise RuntimeError('Use one-hot encoded labels for multilabel classification!')
@@ -148,12 +151,14 @@ class TorchTransformersClassifierModel(TorchModel):
         for elem in ['input_ids', 'attention_mask', 'token_type_ids']:
             _input[elem] = torch.cat(_input[elem], dim=0).to(self.device)
 
-        with torch.no_grad():
+        with torch.no_grad(), torch.cuda.amp.autocast(enabled=self.amp and self.device.type == "cuda"):
             tokenized = {key:value for (key,value) in _input.items() if key in self.model.forward.__code__.co_varnames}
 
             # Forward pass, calculate logit predictions
             logits = self.model(**tokenized)
             logits = logits[0]
+        # outputs of autocast region may be float16, probabilities are computed in full precision
+        logits = logits.float()
 
         if self.return_probas:
             if not self.multilabel:
@@ -12,11 +12,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import re
 from abc import ABCMeta
 from collections import defaultdict
 from functools import partial
 from itertools import zip_longest, starmap
-from typing import List, Optional, Dict, Callable, Tuple
+from typing import List, Optional, Dict, Callable, Tuple, Pattern
 
 from deeppavlov.core.common.registry import register
 from deeppavlov.skills.dsl_skill.context import UserContext
@@ -24,6 +25,43 @@ from deeppavlov.skills.dsl_skill.handlers.handler import Handler
 from deeppavlov.skills.dsl_skill.handlers.regex_handler import RegexHandler
 from deeppavlov.skills.dsl_skill.utils import SkillResponse, UserId
 
+_NUMBERED_GROUP_REFERENCE_RE = re.compile(r'\\[1-9]|\(\?\(\d+\)')
+_INLINE_GLOBAL_FLAGS_RE = re.compile(r'\(\?[aiLmsux]+\)')
+
+
+def _compile_commands_matcher(handlers: List[Handler],
+                              handler_to_group: Dict[Handler, str]) -> Optional[Pattern]:
+    """
+    Compiles commands of all regex handlers into one pattern. Each handler gets an optional lookahead
+    with a named group, so a single match at the beginning of the message shows which handlers
+    have a command found anywhere in the message, just like separate ``re.search`` calls do.
+
+    Args:
+        handlers: handlers to combine
+        handler_to_group: group name of every handler
+
+    Returns:
+        compiled pattern or None if commands can't be combined into one pattern
+
+    """
+    lookaheads = []
+    for handler in handlers:
+        if not isinstance(handler, RegexHandler):
+            continue
+        if any(_NUMBERED_GROUP_REFERENCE_RE.search(command.pattern) for command in handler.commands):
+            # group numbers in backreferences and conditionals are shifted inside of the combined pattern
+            return None
+        if any(_INLINE_GLOBAL_FLAGS_RE.search(command.pattern) for command in handler.commands):
+            # flags like (?i) would apply to commands of all the other handlers in the combined pattern
+            return None
+        commands = '|'.join(f'(?:{command.pattern})' for command in handler.commands)
+        lookaheads.append(f'(?:(?=[\\s\\S]*?(?P<{handler_to_group[handler]}>{commands}))|)')
+    try:
+        return re.compile(''.join(lookaheads))
+    except re.error:
+        # e.g. the same group name is used in commands of different handlers
+        return None
+
 
 class DSLMeta(ABCMeta):
     """
@@ -43,8 +81,10 @@ class DSLMeta(ABCMeta):
     Attributes:
         name: class name
         state_to_handler: dict with states as keys and lists of Handler objects as values
+        state_to_available_handlers: dict with states as keys and tuples of Handler objects that can be activated
+            in the state, sorted by priority, as values
         user_to_context: dict with user ids as keys and UserContext objects as values
-        universal_handlers: list of handlers that can be activated from any state
+        universal_handlers: list of handlers that can be activated from any state, sorted by priority
 
     """
     skill_collection: Dict[str, 'DSLMeta'] = {}
@@ -67,6 +107,20 @@ class DSLMeta(ABCMeta):
             else:
                 cls.state_to_handler[handler.state].append(handler)
 
+        # handlers available in each state are merged with universal ones and sorted by priority only once
+        cls.universal_handlers.sort(key=lambda h: h.priority, reverse=True)
+        cls.state_to_available_handlers = {
+            state: tuple(sorted(state_handlers + cls.universal_handlers, key=lambda h: h.priority, reverse=True))
+            for state, state_handlers in cls.state_to_handler.items()
+        }
+
+        # commands of all handlers available in a state are matched against the message at once
+        cls.handler_to_group = {handler: f'_handler{i}' for i, handler in enumerate(handlers)}
+        cls.state_to_matcher = {state: _compile_commands_matcher(state_handlers + cls.universal_handlers,
+                                                                 cls.handler_to_group)
+                                for state, state_handlers in cls.state_to_handler.items()}
+        cls.universal_matcher = _compile_commands_matcher(cls.universal_handlers, cls.handler_to_group)
+
         cls.handle = partial(DSLMeta.__handle, cls)
         cls.__call__ = partial(DSLMeta.__handle_batch, cls)
         cls.__init__ = partial(DSLMeta.__init__class, cls)
@@ -106,7 +160,10 @@ class DSLMeta(ABCMeta):
                 skill inference result.
 
         """
-        return (*map(list, zip(*starmap(cls.handle, zip_longest(utterances_batch, user_ids_batch)))),)
+        responses = list(starmap(cls.handle, zip_longest(utterances_batch, user_ids_batch)))
+        if not responses:
+            return tuple([] for _ in SkillResponse._fields)
+        return tuple(map(list, zip(*responses)))
 
     @staticmethod
     def __add_to_collection(cls: 'DSLMeta') -> None:
@@ -154,11 +211,17 @@ class DSLMeta(ABCMeta):
              handler function that is selected and None if no handler fits request
 
         """
-        available_handlers = cls.state_to_handler[context.current_state]
-        available_handlers.extend(cls.universal_handlers)
-        available_handlers.sort(key=lambda h: h.priority, reverse=True)
+        available_handlers = cls.state_to_available_handlers.get(context.current_state, cls.universal_handlers)
+        matcher = cls.state_to_matcher.get(context.current_state, cls.universal_matcher)
+        match = matcher.match(' '.join(context.message)) if matcher is not None else None
         for handler in available_handlers:
-            if handler.check(context):
+            if match is not None and isinstance(handler, RegexHandler):
+                # commands are already matched, only context condition is left to check
+                is_triggered = match.group(cls.handler_to_group[handler]) is not None and \
+                    Handler.check(handler, context)
+            else:
+                is_triggered = handler.check(context)
+            if is_triggered:
                 handler.expand_context(context)
                 return handler.func
 
@@ -34,7 +34,7 @@ class RegexHandler(Handler):
         context_condition: predicate that accepts user context and checks if the handler should be activated.
          Example: `lambda context: context.user_id != 1` checks if user_id is not equal to 1.
          That means a user with id 1 will be always ignored by the handler.
-        commands: handler is activated if regular expression from this list is matched with a user message
+        commands: handler is activated if one of these compiled regular expressions is matched with a user message
 
     """
 
@@ -45,7 +45,7 @@ class RegexHandler(Handler):
                  context_condition: Optional[Callable] = None,
                  priority: int = 0):
         super().__init__(func, state, context_condition, priority)
-        self.commands = [re.compile(command) for command in commands]
+        self.commands = tuple(re.compile(command) for command in commands)
 
     def check(self, context: UserContext) -> bool:
         """
@@ -63,14 +63,15 @@ class RegexHandler(Handler):
         if not is_previous_matches:
             return False
 
-        message = context.message
-        return any(re.search(regexp, ' '.join(message)) for regexp in self.commands)
+        text = ' '.join(context.message)
+        return any(regexp.search(text) for regexp in self.commands)
 
     def expand_context(self, context: UserContext) -> UserContext:
         context.handler_payload = {'regex_groups': {}}
         message = context.message
+        text = ' '.join(message)
         for regexp in self.commands:
-            match = re.search(regexp, ' '.join(message))
+            match = regexp.search(text)
             if match is not None:
                 for group_ind, span in enumerate(match.regs):
                     context.handler_payload['regex_groups'][group_ind] = message[span[0]: span[1]]
@@ -12,11 +12,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
 import shutil
-from collections import defaultdict
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import zip_longest
 from logging import getLogger
 from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
 
+import numpy as np
 import requests
 from lxml import html
 
@@ -28,6 +34,149 @@ from deeppavlov.core.data.utils import is_done, mark_done
 log = getLogger(__name__)
 
 
+def _build_trie_levels(words: List[str], prev: str = '') -> List[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """Builds levels of breadth-first ordered :class:`WordsTrie` nodes for sorted non-empty words
+
+    In breadth-first order nodes of every level follow alphabetical order of their prefixes, so levels are filled
+    in a single pass over sorted words, adding nodes only after the common prefix with the previous word.
+
+    Args:
+        words: sorted non-empty words
+        prev: word preceding the first of the words, nodes of its prefixes are not added
+
+    Returns:
+        code points of characters, indices of parents in the previous level and word end flags of nodes
+        of every level. Parent index -1 stands for the last node of the level added for preceding words
+    """
+    levels_chars, levels_parents, levels_is_word = [], [], []
+    for word in words:
+        lcp, max_lcp = 0, min(len(prev), len(word))
+        while lcp < max_lcp and prev[lcp] == word[lcp]:
+            lcp += 1
+        while len(levels_chars) < len(word):
+            levels_chars.append(array('I'))
+            levels_parents.append(array('i'))
+            levels_is_word.append(array('b'))
+        for depth in range(lcp, len(word)):
+            levels_chars[depth].append(ord(word[depth]))
+            levels_parents[depth].append(len(levels_chars[depth - 1]) - 1 if depth else WordsTrie.ROOT)
+            levels_is_word[depth].append(depth == len(word) - 1)
+        prev = word
+    return [(np.array(chars, dtype=np.uint32), np.array(parents, dtype=np.int32), np.array(is_word, dtype=bool))
+            for chars, parents, is_word in zip(levels_chars, levels_parents, levels_is_word)]
+
+
+class WordsTrie:
+    """Array-based trie of words
+
+    Nodes are numbered in breadth-first order with the root node having index 0, so edges going out of every node
+    are stored contiguously and sorted by their characters: edges of the i-th node have indices from ``offsets[i]``
+    to ``offsets[i + 1]`` and the j-th edge leads to the node ``j + 1``. Arrays are memory-mapped on load,
+    so only the pages touched by lookups are read from disk. Expansions of recently used nodes are cached.
+
+    Args:
+        offsets: indices of the first outgoing edge of every node, with the total number of edges appended
+        chars: code points of characters of the edges
+        is_word: flags of nodes which end a word
+    """
+
+    ROOT = 0
+    _arrays = ('offsets', 'chars', 'is_word')
+
+    def __init__(self, offsets: np.ndarray, chars: np.ndarray, is_word: np.ndarray) -> None:
+        self.offsets = offsets
+        self.chars = chars
+        self.is_word = is_word
+        # shallow nodes are expanded in the search for candidates of almost every word
+        self.expand = lru_cache(maxsize=2 ** 15)(self.expand)
+
+    @classmethod
+    def from_words(cls, words: Iterable[str], n_jobs: Optional[int] = 1) -> 'WordsTrie':
+        """Builds a trie of the words
+
+        Args:
+            words: words to put into the trie
+            n_jobs: number of processes building levels of the trie from consecutive chunks of sorted words.
+                If None, the number of CPUs is used
+        """
+        words = sorted(words)
+        is_root_word = bool(words) and not words[0]
+        if is_root_word:
+            words = words[1:]
+
+        n_jobs = n_jobs or os.cpu_count() or 1
+        chunk_size = max(-(-len(words) // n_jobs), 1)
+        chunks = [words[i:i + chunk_size] for i in range(0, len(words), chunk_size)]
+        # every chunk starts after the last word of the previous one and shares nodes of their common prefix
+        prevs = [''] + [chunk[-1] for chunk in chunks[:-1]]
+        if len(chunks) > 1:
+            with ProcessPoolExecutor(len(chunks)) as executor:
+                shards = list(executor.map(_build_trie_levels, chunks, prevs))
+        else:
+            shards = list(map(_build_trie_levels, chunks, prevs))
+
+        levels = []
+        for shard in shards:
+            parents_shifts = [sum(len(chars) for chars, _, _ in level) for level in levels] + [0] * len(shard)
+            for depth, (chars, parents, is_word) in enumerate(shard):
+                if depth == len(levels):
+                    levels.append([])
+                if depth:
+                    parents = parents + parents_shifts[depth - 1]
+                levels[depth].append((chars, parents, is_word))
+        levels = [[np.concatenate(parts) for parts in zip(*level)] for level in levels]
+        levels_chars, levels_parents, levels_is_word = ([level[i] for level in levels] for i in range(3))
+
+        children_counts = [np.array([len(levels_chars[0]) if levels_chars else 0])]
+        for level_chars, next_level_parents in zip_longest(levels_chars, levels_parents[1:],
+                                                           fillvalue=np.array([], dtype=np.int32)):
+            children_counts.append(np.bincount(next_level_parents, minlength=len(level_chars)))
+        children_counts = np.concatenate(children_counts)
+
+        offsets = np.zeros(len(children_counts) + 1, dtype=np.int32)
+        np.cumsum(children_counts, out=offsets[1:])
+        chars = np.concatenate(levels_chars + [np.array([], dtype=np.uint32)])
+        is_word = np.concatenate([[is_root_word]] + levels_is_word)
+        return cls(offsets, chars, is_word)
+
+    @classmethod
+    def paths(cls, data_dir: Path) -> Dict[str, Path]:
+        return {name: data_dir / f'words_trie_{name}.npy' for name in cls._arrays}
+
+    def save(self, data_dir: Path) -> None:
+        for name, path in self.paths(data_dir).items():
+            np.save(path, getattr(self, name))
+
+    @classmethod
+    def load(cls, data_dir: Path) -> 'WordsTrie':
+        # plain ndarray views of memory maps are sliced several times faster than np.memmap objects
+        return cls(**{name: np.asarray(np.load(path, mmap_mode='r')) for name, path in cls.paths(data_dir).items()})
+
+    def find(self, prefix: str) -> Optional[int]:
+        """Returns index of the node of the prefix or None if there is no such prefix in the trie"""
+        node = self.ROOT
+        for c in prefix:
+            start, end = self.offsets[node], self.offsets[node + 1]
+            i = start + np.searchsorted(self.chars[start:end], ord(c))
+            if i == end or self.chars[i] != ord(c):
+                return None
+            node = i + 1
+        return int(node)
+
+    def expand(self, prefix: str, node: int) -> List[Tuple[str, int]]:
+        """Returns all the prefixes from the trie that are one character longer than the given one
+        in alphabetical order along with their nodes. The returned list is shared between calls and must not be
+        modified"""
+        start, end = self.offsets[node:node + 2].tolist()
+        return [(prefix + chr(c), child) for child, c in enumerate(self.chars[start:end].tolist(), start + 1)]
+
+    def __getitem__(self, prefix: str) -> List[str]:
+        node = self.find(prefix)
+        if node is None:
+            raise KeyError(prefix)
+        return [child_prefix for child_prefix, _ in self.expand(prefix, node)]
+
+
 @register('static_dictionary')
 class StaticDictionary:
     """Trie vocabulary used in spelling correction algorithms
@@ -37,22 +186,25 @@ class StaticDictionary:
             relative to pipeline's data directory
         dictionary_name: logical name of the dictionary
         raw_dictionary_path: path to the source file with the list of words
+        n_jobs: number of processes used to build the trie, the trie is built in the current process by default.
+            If None, the number of CPUs is used
 
     Attributes:
         dict_name: logical name of the dictionary
         alphabet: set of all the characters used in this dictionary
-        words_set: set of all the words
-        words_trie: trie structure of all the words
+        words_set: frozenset of all the words
+        words_trie: :class:`WordsTrie` of all the words
     """
 
-    def __init__(self, data_dir: [Path, str] = '', *args, dictionary_name: str = 'dictionary', **kwargs):
+    def __init__(self, data_dir: [Path, str] = '', *args, dictionary_name: str = 'dictionary',
+                 n_jobs: Optional[int] = 1, **kwargs):
         data_dir = expand_path(data_dir) / dictionary_name
 
-        alphabet_path = data_dir / 'alphabet.pkl'
+        alphabet_path = data_dir / 'alphabet.npy'
         words_path = data_dir / 'words.pkl'
-        words_trie_path = data_dir / 'words_trie.pkl'
+        paths = [alphabet_path, words_path, *WordsTrie.paths(data_dir).values()]
 
-        if not is_done(data_dir):
+        if not is_done(data_dir) or not all(path.is_file() for path in paths):
             log.info('Trying to build a dictionary in {}'.format(data_dir))
             if data_dir.is_dir():
                 shutil.rmtree(str(data_dir))
@@ -65,26 +217,19 @@ class StaticDictionary:
             alphabet.remove('⟬')
             alphabet.remove('⟭')
 
-            save_pickle(alphabet, alphabet_path)
-            save_pickle(words, words_path)
-
-            words_trie = defaultdict(set)
-            for word in words:
-                for i in range(len(word)):
-                    words_trie[word[:i]].add(word[:i + 1])
-                words_trie[word] = set()
-            words_trie = {k: sorted(v) for k, v in words_trie.items()}
+            np.save(alphabet_path, np.array(sorted(map(ord, alphabet)), dtype=np.uint32))
+            save_pickle(frozenset(words), words_path)
 
-            save_pickle(words_trie, words_trie_path)
+            WordsTrie.from_words(words, n_jobs=n_jobs).save(data_dir)
 
             mark_done(data_dir)
             log.info('built')
         else:
             log.info('Loading a dictionary from {}'.format(data_dir))
 
-        self.alphabet = load_pickle(alphabet_path)
+        self.alphabet = frozenset(map(chr, np.load(alphabet_path).tolist()))
         self.words_set = load_pickle(words_path)
-        self.words_trie = load_pickle(words_trie_path)
+        self.words_trie = WordsTrie.load(data_dir)
 
     @staticmethod
     def _get_source(data_dir, raw_dictionary_path, *args, **kwargs):
@@ -95,7 +240,7 @@ class StaticDictionary:
 
     @staticmethod
     def _normalize(word):
-        return '⟬{}⟭'.format(word.strip().lower().replace('ё', 'е'))
+        return f"⟬{word.strip().lower().replace('ё', 'е')}⟭"
 
 
 @register('russian_words_vocab')
@@ -105,12 +250,14 @@ class RussianWordsVocab(StaticDictionary):
     Args:
         data_dir: path to the directory where the built trie will be stored. Relative paths are interpreted as
             relative to pipeline's data directory
+        n_jobs: number of processes used to build the trie, the trie is built in the current process by default.
+            If None, the number of CPUs is used
 
     Attributes:
         dict_name: logical name of the dictionary
         alphabet: set of all the characters used in this dictionary
-        words_set: set of all the words
-        words_trie: trie structure of all the words
+        words_set: frozenset of all the words
+        words_trie: :class:`WordsTrie` of all the words
     """
 
     def __init__(self, data_dir: [Path, str] = '', *args, **kwargs):
@@ -133,12 +280,14 @@ class Wiki100KDictionary(StaticDictionary):
     Args:
         data_dir: path to the directory where the built trie will be stored. Relative paths are interpreted as
             relative to pipeline's data directory
+        n_jobs: number of processes used to build the trie, the trie is built in the current process by default.
+            If None, the number of CPUs is used
 
     Attributes:
         dict_name: logical name of the dictionary
         alphabet: set of all the characters used in this dictionary
-        words_set: set of all the words
-        words_trie: trie structure of all the words
+        words_set: frozenset of all the words
+        words_trie: :class:`WordsTrie` of all the words
     """
 
     def __init__(self, data_dir: [Path, str] = '', *args, **kwargs):
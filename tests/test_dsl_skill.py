@@ -41,6 +41,34 @@ class ContextConditionSkill(metaclass=DSLMeta):
         return response, confidence
 
 
+class InlineFlagsSkill(metaclass=DSLMeta):
+    @DSLMeta.handler(commands=["(?i)HELLO"])
+    def greeting(context):
+        response = "Hello, my friend!"
+        confidence = 1.0
+        return response, confidence
+
+    @DSLMeta.handler(commands=["Bye"])
+    def bye(context):
+        response = "bb!"
+        confidence = 1.0
+        return response, confidence
+
+
+class NumberedConditionalSkill(metaclass=DSLMeta):
+    @DSLMeta.handler(commands=["(x)"], context_condition=lambda context: False)
+    def never(context):
+        response = "Never"
+        confidence = 1.0
+        return response, confidence
+
+    @DSLMeta.handler(commands=["(a)?(?(1)b|c)"])
+    def conditional(context):
+        response = "Conditional"
+        confidence = 1.0
+        return response, confidence
+
+
 class TestDSLSkill:
     def setup(self):
         self.skill_config = read_json(configs.skills.dsl_skill)
@@ -90,6 +118,21 @@ class TestDSLSkill:
         assert "Sorry, I do not understand you" in history_of_responses[1][0]
         assert "bb!" in history_of_responses[2][0]
 
+    def test_handlers_are_not_changed(self):
+        user_messages_sequence = [
+            "Hello",
+            "bye",
+            "bye"
+        ]
+
+        self.skill_config["chainer"]["pipe"][1]["class_name"] = "StateSkill"
+        skill = build_model(self.skill_config, download=True)
+
+        for each_utt in user_messages_sequence:
+            skill([each_utt], [0])
+        assert len(StateSkill.state_to_handler["state1"]) == 1
+        assert len(StateSkill.universal_handlers) == 1
+
     def test_context_condition(self):
         user_messages_sequence = [
             "Hello",
@@ -107,3 +150,41 @@ class TestDSLSkill:
             history_of_responses.append(responses_batch)
         assert "Hello, my friend!" in history_of_responses[0][0]
         assert "Sorry, I do not understand you" in history_of_responses[1][0]
+
+    def test_inline_flags_do_not_affect_other_handlers(self):
+        user_messages_sequence = [
+            "Hello",
+            "bye"
+        ]
+
+        self.skill_config["chainer"]["pipe"][1]["class_name"] = "InlineFlagsSkill"
+        skill = build_model(self.skill_config, download=True)
+
+        history_of_responses = []
+        for user_id, each_utt in enumerate(user_messages_sequence):
+            log.info(f"User says: {each_utt}")
+            responses_batch = skill([each_utt], [user_id])
+            log.info(f"Bot says: {responses_batch[0]}")
+            history_of_responses.append(responses_batch)
+        assert "Hello, my friend!" in history_of_responses[0][0]
+        assert "Sorry, I do not understand you" in history_of_responses[1][0]
+
+    def test_numbered_conditionals_refer_to_own_groups(self):
+        user_messages_sequence = [
+            "xc",
+            "ab",
+            "xb"
+        ]
+
+        self.skill_config["chainer"]["pipe"][1]["class_name"] = "NumberedConditionalSkill"
+        skill = build_model(self.skill_config, download=True)
+
+        history_of_responses = []
+        for user_id, each_utt in enumerate(user_messages_sequence):
+            log.info(f"User says: {each_utt}")
+            responses_batch = skill([each_utt], [user_id])
+            log.info(f"Bot says: {responses_batch[0]}")
+            history_of_responses.append(responses_batch)
+        assert "Conditional" in history_of_responses[0][0]
+        assert "Conditional" in history_of_responses[1][0]
+        assert "Sorry, I do not understand you" in history_of_responses[2][0]
@@ -0,0 +1,68 @@
+import pytest
+
+from deeppavlov.models.kbqa.utils import clean_question, extract_year, fill_query, make_combs
+
+
+@pytest.mark.parametrize("question,year", [
+    ("born 01/02/1999 and 2020-01-01", "1999"),
+    ("in 12-11-2003 or 1999-1-1", "2003"),
+    ("from 1999-1-1 to 2003-2-2", "2003"),
+    ("between 1/2/1999 and 3/4/2005", "2005"),
+    ("what happened in 1812", "1812"),
+    ("what happened", "")
+])
+def test_extract_year(question, year):
+    assert extract_year(question.split(), question) == year
+
+
+@pytest.mark.parametrize("question,cleaned", [
+    ("who is { the } president?", "who is the president?"),
+    ("x  .", "x "),
+    ("a { . b", "a b"),
+    ('"Moby Dick" (novel) – author', "'Moby Dick' novel - author")
+])
+def test_clean_question(question, cleaned):
+    assert clean_question(question) == cleaned
+
+
+@pytest.mark.parametrize("entity_ids,permut,combs", [
+    ([], False, [[0]]),
+    ([], True, [[0]]),
+    ([["Q1"], []], False, []),
+    ([["Q1"]], False, [["Q1", 0]]),
+    ([["Q1"]], True, [["Q1", 0]]),
+    ([["Q1", "Q2"]], True, [["Q1", 0], ["Q2", 1]]),
+    ([["Q1", "Q2"], ["Q3"]], False, [["Q1", "Q3", 0], ["Q2", "Q3", 1]]),
+    ([["Q1", "Q2"], ["Q3"]], True, [["Q1", "Q3", 0], ["Q3", "Q1", 0], ["Q2", "Q3", 1], ["Q3", "Q2", 1]]),
+    ([["Q1", "Q2"], ["Q3", "Q4"]], False,
+     [["Q1", "Q3", 0], ["Q1", "Q4", 1], ["Q2", "Q3", 1], ["Q2", "Q4", 2]]),
+    ([["Q1", "Q2"], ["Q3"], ["Q4"]], True,
+     [["Q1", "Q3", "Q4", 0], ["Q1", "Q4", "Q3", 0], ["Q3", "Q1", "Q4", 0],
+      ["Q3", "Q4", "Q1", 0], ["Q4", "Q1", "Q3", 0], ["Q4", "Q3", "Q1", 0],
+      ["Q2", "Q3", "Q4", 1], ["Q2", "Q4", "Q3", 1], ["Q3", "Q2", "Q4", 1],
+      ["Q3", "Q4", "Q2", 1], ["Q4", "Q2", "Q3", 1], ["Q4", "Q3", "Q2", 1]])
+])
+def test_make_combs(entity_ids, permut, combs):
+    assert make_combs(entity_ids, permut) == combs
+
+
+@pytest.mark.parametrize("query,entity_comb,type_comb,rel_comb,filled_query", [
+    ("select ?obj where { wd:e1 p:r1 ?s . ?s ps:r1 ?obj . ?s pq:r2 wd:e2 }",
+     ["Q159", "Q42", 0], [], [("P17", 0.9), ("P585", 0.5), 1],
+     "select ?obj where { http://www.wikidata.org/entity/Q159 http://www.wikidata.org/prop/P17 ?s . "
+     "?s http://www.wikidata.org/prop/statement/P17 ?obj . "
+     "?s http://www.wikidata.org/prop/qualifier/P585 http://www.wikidata.org/entity/Q42 }"),
+    ("select ?ent where { ?ent wdt:P31 wd:t1 . ?ent wdt:r1 wd:e1 }",
+     ["Q30", 0], ["Q515", 0], [("P17", 0.9), 0],
+     "select ?ent where { ?ent http://www.wikidata.org/prop/direct/P31 http://www.wikidata.org/entity/Q515 . "
+     "?ent http://www.wikidata.org/prop/direct/P17 http://www.wikidata.org/entity/Q30 }"),
+    ("select ?obj where { wd:e1 wdt:r1 ?obj }",
+     ["Q2", 0], [], [("P0", 1.0), 0],
+     "select ?obj where { http://www.wikidata.org/entity/Q2 http://schema.org/description ?obj }"),
+    ("select ?obj where { wd:e1 wdt:r1 ?obj . wd:e2 wdt:r2 ?obj }",
+     ["Q2", 0], [], [("P31", 1.0), 0],
+     "select ?obj where { http://www.wikidata.org/entity/Q2 http://www.wikidata.org/prop/direct/P31 ?obj . "
+     "http://www.wikidata.org/entity/e2 http://www.wikidata.org/prop/direct/r2 ?obj }")
+])
+def test_fill_query(query, entity_comb, type_comb, rel_comb, filled_query):
+    assert fill_query(query.split(), entity_comb, type_comb, rel_comb) == filled_query.split(" ")
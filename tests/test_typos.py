@@ -0,0 +1,98 @@
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pytest
+
+from deeppavlov.vocabs.typos import StaticDictionary, WordsTrie
+
+WORDS = ["ёлка", "елки", "дом", "домик", "дома", "кот", "Кит", "кит"]
+
+
+def dict_trie(words: Iterable[str]) -> Dict[str, List[str]]:
+    """Prefix -> sorted one character longer prefixes, the structure the array trie replaced"""
+    trie = defaultdict(set)
+    for word in words:
+        for i in range(len(word)):
+            trie[word[:i]].add(word[:i + 1])
+        trie.setdefault(word, set())
+    return {prefix: sorted(children) for prefix, children in trie.items()}
+
+
+def assert_same_as_dict_trie(trie: WordsTrie, words: Iterable[str]) -> None:
+    words = set(words)
+    expected = dict_trie(words)
+    for prefix, children in expected.items():
+        node = trie.find(prefix)
+        assert node is not None
+        assert bool(trie.is_word[node]) == (prefix in words)
+        assert trie.expand(prefix, node) == [(child, trie.find(child)) for child in children]
+        assert trie[prefix] == children
+    for prefix in ["x", "домики", "⟬дом⟭⟭", "ко"]:
+        if prefix not in expected:
+            assert trie.find(prefix) is None
+            with pytest.raises(KeyError):
+                trie[prefix]
+
+
+@pytest.fixture
+def raw_dictionary_path(tmp_path: Path) -> Path:
+    path = tmp_path / "words.txt"
+    path.write_text("\n".join(WORDS) + "\n", encoding="utf8")
+    return path
+
+
+def test_words_set(tmp_path: Path, raw_dictionary_path: Path):
+    dictionary = StaticDictionary(tmp_path / "data", raw_dictionary_path=str(raw_dictionary_path))
+    expected = {StaticDictionary._normalize(word) for word in WORDS}
+    # membership is checked for every prefix in the search of candidates, so it has to be a hash lookup
+    assert isinstance(dictionary.words_set, frozenset)
+    assert dictionary.words_set == expected
+    assert "⟬елка⟭" in dictionary.words_set
+    assert "⟬дом" not in dictionary.words_set
+
+
+@pytest.mark.parametrize("words", [
+    [],
+    [""],
+    ["a"],
+    ["a", "ab", "abc", "b"],
+    ["", "x", "xy"],
+    [StaticDictionary._normalize(word) for word in WORDS]
+])
+def test_words_trie(words: List[str]):
+    assert_same_as_dict_trie(WordsTrie.from_words(words), words)
+
+
+def test_words_trie_save_load(tmp_path: Path):
+    words = [StaticDictionary._normalize(word) for word in WORDS]
+    trie = WordsTrie.from_words(words)
+    trie.save(tmp_path)
+    loaded = WordsTrie.load(tmp_path)
+    for name in ("offsets", "chars", "is_word"):
+        assert np.array_equal(getattr(loaded, name), getattr(trie, name))
+    assert_same_as_dict_trie(loaded, words)
+
+
+def test_dictionary_is_rebuilt_if_files_are_missing(tmp_path: Path, raw_dictionary_path: Path):
+    StaticDictionary(tmp_path / "data", raw_dictionary_path=str(raw_dictionary_path))
+    chars_path = WordsTrie.paths(tmp_path / "data" / "dictionary")["chars"]
+    chars_path.unlink()
+
+    dictionary = StaticDictionary(tmp_path / "data", raw_dictionary_path=str(raw_dictionary_path))
+    assert chars_path.is_file()
+    assert_same_as_dict_trie(dictionary.words_trie, dictionary.words_set)
+
+
+@pytest.mark.parametrize("n_jobs", [2, 3])
+def test_words_trie_parallel_build(n_jobs: int):
+    letters = "абвгд"
+    # words sharing long prefixes across chunk boundaries and words of different lengths
+    words = [StaticDictionary._normalize(a + b + c * i)
+             for a in letters for b in letters for c in letters for i in range(4)]
+    serial = WordsTrie.from_words(words, n_jobs=1)
+    parallel = WordsTrie.from_words(words, n_jobs=n_jobs)
+    for name in ("offsets", "chars", "is_word"):
+        assert getattr(parallel, name).dtype == getattr(serial, name).dtype
+        assert np.array_equal(getattr(parallel, name), getattr(serial, name))
@@ -0,0 +1,80 @@
+import multiprocessing as mp
+from typing import Iterator, List, Tuple
+
+import pytest
+
+from deeppavlov.models.kbqa import wiki_parser
+from deeppavlov.models.kbqa.wiki_parser import WikiParser
+
+ENTITY = "http://www.wikidata.org/entity/"
+PROP = "http://www.wikidata.org/prop/direct/"
+
+TRIPLETS = [
+    [ENTITY + "Q159", PROP + "P36", ENTITY + "Q649"],
+    [ENTITY + "Q183", PROP + "P36", ENTITY + "Q64"],
+    [ENTITY + "Q649", PROP + "P17", ENTITY + "Q159"],
+    [ENTITY + "Q64", PROP + "P17", ENTITY + "Q183"],
+    [ENTITY + "Q649", PROP + "P31", ENTITY + "Q515"],
+    [ENTITY + "Q64", PROP + "P31", ENTITY + "Q515"]
+]
+
+
+class StubHDTDocument:
+    def __init__(self, filename: str):
+        self.filename = filename
+
+    def search_triples(self, subj: str, rel: str, obj: str) -> Tuple[Iterator[List[str]], int]:
+        found = [triplet for triplet in TRIPLETS
+                 if all(not elem or elem == triplet_elem for elem, triplet_elem in zip((subj, rel, obj), triplet))]
+        return iter(found), len(found)
+
+
+CAPITAL_OF_RUSSIA = (["?obj"], [[ENTITY + "Q159", PROP + "P36", "?obj"]], [], None)
+CITY_IN_GERMANY = (["?ent"], [["?ent", PROP + "P31", ENTITY + "Q515"], ["?ent", PROP + "P17", ENTITY + "Q183"]],
+                   [], None)
+COUNTRY_OF_RUSSIA = (["?obj"], [[ENTITY + "Q159", PROP + "P17", "?obj"]], [], None)
+
+
+@pytest.fixture
+def make_parser(monkeypatch, tmp_path):
+    # worker processes are forked, so they open the stub document as well
+    monkeypatch.setattr(wiki_parser, "HDTDocument", StubHDTDocument)
+    parsers = []
+
+    def make(n_workers: int) -> WikiParser:
+        parser = WikiParser(str(tmp_path / "wikidata.hdt"), n_workers=n_workers)
+        parsers.append(parser)
+        return parser
+
+    yield make
+    for parser in parsers:
+        parser.destroy()
+
+
+pool_is_forked = pytest.mark.skipif(mp.get_start_method() != "fork",
+                                    reason="stub document is not available in spawned workers")
+
+
+@pool_is_forked
+def test_execute_queries(make_parser):
+    queries = [query + (False,) for query in [CAPITAL_OF_RUSSIA, CITY_IN_GERMANY, COUNTRY_OF_RUSSIA] * 3]
+    expected = [[[ENTITY + "Q649"]], [[ENTITY + "Q64"]], []] * 3
+    assert make_parser(0)(["query_execute"] * len(queries), queries) == expected
+    assert make_parser(2)(["query_execute"] * len(queries), queries) == expected
+
+
+@pool_is_forked
+@pytest.mark.parametrize("n_workers", [0, 2])
+def test_execute_queries_return_if_found(make_parser, n_workers):
+    queries = [query + (True,) for query in [COUNTRY_OF_RUSSIA, CITY_IN_GERMANY, CAPITAL_OF_RUSSIA]]
+    expected = [[], [[ENTITY + "Q64"]]]
+    assert make_parser(n_workers)(["query_execute"] * len(queries), queries) == expected
+
+
+@pool_is_forked
+def test_destroy(make_parser):
+    parser = make_parser(2)
+    assert parser.pool is not None
+    parser.destroy()
+    assert parser.pool is None
+    parser.destroy()